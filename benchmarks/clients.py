@@ -0,0 +1,177 @@
+"""
+Measure end-to-end throughput of the clients against the offline stand-in in
+`benchmarks/standin.py`, at several class sizes.
+
+    python benchmarks/clients.py [--sizes 50 500 5000] [--latency 0.02]
+                                 [--error-rate 0.01] [--only index,bulk]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from standin import StandIn  # noqa: E402
+
+from tutorops.canvas.api import CanvasAPI, CanvasClient  # noqa: E402
+from tutorops.canvas.api.client import AsyncCanvasClient  # noqa: E402
+from tutorops.canvas.api.loader import submission_loader, user_loader  # noqa: E402
+from tutorops.canvas.qti import (  # noqa: E402
+    EssayQuestion,
+    build_question_banks,
+    import_question_banks,
+)
+from tutorops.github import GitHub  # noqa: E402
+
+
+def canvas(standin: StandIn):
+    client = CanvasClient(
+        standin.canvas_url,
+        "token",
+        transport=standin.transport(),
+        async_transport=standin.async_transport(),
+    )
+    return CanvasAPI(client, course_id=1, assignment_id=1)
+
+
+def index(standin, workers):
+    return sum(1 for _ in canvas(standin).submissions.index(workers=workers))
+
+
+def update_many(standin, concurrency):
+    updates = [
+        (user_id, {"submission": {"posted_grade": 10}})
+        for user_id in standin.submissions
+    ]
+    return len(
+        canvas(standin).submissions.update_many(updates, concurrency=concurrency)
+    )
+
+
+def bulk_update_grades(standin, chunk_size):
+    grade_data = {user_id: {"posted_grade": 10} for user_id in standin.submissions}
+    return len(
+        canvas(standin).submissions.bulk_update_grades(
+            grade_data, chunk_size=chunk_size, interval=0.01
+        )
+    )
+
+
+def list_active_students(standin, prefetch):
+    return sum(1 for _ in canvas(standin).iter_active_students(prefetch=prefetch))
+
+
+def load_students(standin, chunk_size):
+    async def load():
+        client = AsyncCanvasClient(
+            standin.canvas_url, "token", transport=standin.async_transport()
+        )
+        users = user_loader(client, chunk_size=chunk_size)
+        submissions = submission_loader(client, 1, chunk_size=chunk_size)
+        user_ids = list(standin.submissions)
+        await asyncio.gather(users.load_many(user_ids), submissions.load_many(user_ids))
+        return len(user_ids)
+
+    return asyncio.run(load())
+
+
+def harvest_commits(standin, concurrency):
+    github = GitHub(
+        "token",
+        transport=standin.transport(),
+        async_transport=standin.async_transport(),
+    )
+    return len(github.harvest_commits(1, concurrency=concurrency))
+
+
+def snapshot_repositories(standin, chunk_size):
+    github = GitHub("token", transport=standin.transport())
+    return len(
+        github.snapshot_repositories(standin.repositories, chunk_size=chunk_size)
+    )
+
+
+def question(i):
+    return EssayQuestion(f"Essay {i}", f"<p>Question {i}</p>", 2)
+
+
+def question_banks(standin, workers):
+    count = len(standin.students)
+    with tempfile.TemporaryDirectory() as directory:
+        build_question_banks(
+            os.path.join(directory, "bank-{}.xml"),
+            "Benchmark",
+            question,
+            count,
+            max_items=500,
+            workers=workers,
+        )
+    return count
+
+
+def import_banks(standin, workers):
+    banks = {
+        f"Bank {start}": [
+            question(i) for i in range(start, min(start + 50, len(standin.students)))
+        ]
+        for start in range(0, len(standin.students), 50)
+    }
+    results = import_question_banks(
+        canvas(standin), banks, workers=workers, interval=0.01
+    )
+    failed = [e for e in results.values() if isinstance(e, Exception)]
+    if failed:
+        raise failed[0]
+    return sum(len(questions) for questions in banks.values())
+
+
+CASES = {
+    "index": [("serial", index, 0), ("4 workers", index, 4)],
+    "update": [("concurrency 8", update_many, 8), ("concurrency 32", update_many, 32)],
+    "bulk": [("chunks of 100", bulk_update_grades, 100)],
+    "students": [
+        ("serial", list_active_students, False),
+        ("prefetch", list_active_students, True),
+    ],
+    "loader": [("chunks of 50", load_students, 50)],
+    "harvest": [("concurrency 16", harvest_commits, 16)],
+    "snapshot": [("chunks of 50", snapshot_repositories, 50)],
+    "qti": [("1 worker", question_banks, 1), ("4 workers", question_banks, 4)],
+    "import": [("1 worker", import_banks, 1), ("4 workers", import_banks, 4)],
+}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000])
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--only", default=",".join(CASES))
+    args = parser.parse_args()
+
+    print(f"{'case':>28} {'size':>6} {'items/s':>10} {'requests':>9} {'403':>5}")
+    for name in args.only.split(","):
+        for label, run, arg in CASES[name]:
+            for size in args.sizes:
+                standin = StandIn(
+                    students=size, latency=args.latency, error_rate=args.error_rate
+                )
+                start = time.perf_counter()
+                try:
+                    items = run(standin, arg)
+                except Exception as e:
+                    print(f"{name + ' ' + label:>28} {size:>6} failed: {e!r}")
+                    continue
+                elapsed = time.perf_counter() - start
+                print(
+                    f"{name + ' ' + label:>28} {size:>6} {items / elapsed:>10.0f}"
+                    f" {standin.requests:>9} {standin.throttled:>5}"
+                )
+
+
+if __name__ == "__main__":
+    main()
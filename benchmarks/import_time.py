@@ -0,0 +1,77 @@
+"""
+Guard the import cost of the parts of the package used by short-lived scripts.
+
+Each module is imported in a fresh interpreter under `python -X importtime`.
+The script fails if the import pulls in modules that should only load on use,
+or if its cumulative import time exceeds the budget.
+
+    python benchmarks/import_time.py [--budget-ms 150] [--repeat 5]
+"""
+
+import argparse
+import subprocess
+import sys
+
+MODULES = ["tutorops", "tutorops.canvas.api", "tutorops.canvas.qti", "tutorops.github"]
+
+# Modules that must not be imported until they are actually needed.
+FORBIDDEN = ("dotenv", "pyxb", "tutorops.canvas.qti.binding")
+
+
+def import_time(module):
+    """
+    Import `module` in a fresh interpreter. Returns its cumulative import time
+    in microseconds and the names of all modules imported along the way.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    total, imported = 0, []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        imported.append(name.strip())
+        if name.strip() == module:
+            total = int(cumulative)
+
+    return total, imported
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget-ms", type=float, default=150)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    failed = False
+    for module in MODULES:
+        runs = [import_time(module) for _ in range(args.repeat)]
+        best = min(total for total, _ in runs) / 1000
+        leaked = sorted(
+            {
+                name
+                for name in runs[0][1]
+                if any(name == f or name.startswith(f + ".") for f in FORBIDDEN)
+            }
+        )
+
+        status = "ok"
+        if leaked:
+            status = "imports " + ", ".join(leaked)
+        elif best > args.budget_ms:
+            status = f"over budget ({args.budget_ms:.0f} ms)"
+        failed = failed or status != "ok"
+
+        print(f"{module:>22}: {best:8.1f} ms  {status}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Compare the throughput of serializing question items through the PyXB binding
+and through the templates in `tutorops.canvas.qti.render`.
+
+    python benchmarks/qti_render.py [count]
+"""
+
+import sys
+import time
+from xml.etree.ElementTree import canonicalize
+
+from tutorops.canvas.qti import (
+    EssayQuestion,
+    FileUploadQuestion,
+    FillInMultipleBlanksQuestion,
+    ShortAnswerQuestion,
+)
+from tutorops.canvas.qti.interop import _fragment
+from tutorops.canvas.qti.render import render_item
+
+
+def questions(count):
+    for i in range(count):
+        html = f"<p>Question {i}: what is {i} &amp; {i + 1}?</p>"
+        yield EssayQuestion(f"Essay {i}", html, 2)
+        yield FileUploadQuestion(f"Upload {i}", html, 5)
+        yield ShortAnswerQuestion(f"Short {i}", html, 1, {str(i), f"{i}.0"})
+        yield FillInMultipleBlanksQuestion(
+            f"Blanks {i}", html, 3, {"a": {str(i)}, "b": {str(i + 1), "x<y"}}
+        )
+
+
+def bench(name, serialize, items):
+    start = time.perf_counter()
+    size = sum(len(serialize(q)) for q in items)
+    elapsed = time.perf_counter() - start
+    print(f"{name:>10}: {len(items) / elapsed:10.0f} items/s  {size} bytes")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    items = list(questions(count))
+
+    for q in items[:8]:
+        assert canonicalize(_fragment(q.xml)) == canonicalize(render_item(q))
+        render_item(q, validate=True)
+
+    bench("binding", lambda q: _fragment(q.xml), items)
+    bench("template", render_item, items)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,516 @@
+"""
+An in-process stand-in for the Canvas and GitHub endpoints that tutorops
+uses, for benchmarking and trying out the clients offline.
+
+    standin = StandIn(students=500, latency=0.02)
+    client = CanvasClient(
+        standin.canvas_url,
+        "token",
+        transport=standin.transport(),
+        async_transport=standin.async_transport(),
+    )
+
+Listings are paginated with `Link` headers, numbered for REST and by cursor
+for GraphQL. Canvas GraphQL answers the course roster and the aliased user
+and submission lookups of the batch loaders, and GitHub GraphQL the aliased
+repository snapshots. Content migrations hand out an upload URL on a separate
+file store host, which answers with the file as JSON, or with a redirect to
+it if `upload_redirect` is set, and their progress only moves once the file
+has been uploaded. Submission listings honour `submitted_since` and
+`graded_since`, and grading a submission stamps its `graded_at`.
+
+Canvas requests drain a leaky bucket reported through
+`X-Rate-Limit-Remaining`/`X-Request-Cost` and are rejected with `403 Rate
+Limit Exceeded` once it overflows. GitHub requests count down
+`X-RateLimit-Remaining` per `X-RateLimit-Resource` and are not charged when
+answered with `304`. Every request waits `latency` seconds, and fails with
+`503` at `error_rate`.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+CANVAS = "canvas.test"
+UPLOADS = "uploads.canvas.test"
+GITHUB = "api.github.com"
+
+USER = re.compile(r'(\w+): legacyNode\(_id: "([^"]*)", type: User\)')
+SUBMISSION = re.compile(
+    r'(\w+): assignment\(id: "([^"]*)"\) \{ '
+    r'submissionsConnection\(filter: \{userId: "([^"]*)"\}\)'
+)
+REPOSITORY = re.compile(r'(\w+): repository\(owner: "([^"]*)", name: "([^"]*)"\)')
+
+
+def _cursor(offset):
+    return base64.b64encode(str(offset).encode()).decode()
+
+
+def _offset(cursor):
+    return int(base64.b64decode(cursor)) if cursor else 0
+
+
+def _now():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _grade(submission, score):
+    submission["score"] = score
+    submission["workflow_state"] = "graded"
+    submission["graded_at"] = _now()
+
+
+class StandIn:
+    def __init__(
+        self,
+        *,
+        students=50,
+        latency=0.0,
+        error_rate=0.0,
+        bucket=700.0,
+        leak_rate=10.0,
+        cost=1.0,
+        github_limit=5000,
+        progress_polls=2,
+        upload_redirect=False,
+        seed=0,
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.bucket = bucket
+        self.leak_rate = leak_rate
+        self.cost = cost
+        self.progress_polls = progress_polls
+        self.upload_redirect = upload_redirect
+
+        self.canvas_url = f"https://{CANVAS}"
+        self.github_url = f"https://{GITHUB}"
+
+        self.students = [
+            {
+                "_id": str(i),
+                "name": f"Student {i}",
+                "sisId": f"s{i:05}",
+                "integrationId": None,
+            }
+            for i in range(1, students + 1)
+        ]
+        self.submissions = {
+            i: {
+                "id": 10_000 + i,
+                "user_id": i,
+                "assignment_id": 1,
+                "attempt": 1,
+                "workflow_state": "submitted",
+                "submitted_at": "2024-01-01T00:00:00Z",
+                "graded_at": None,
+                "score": None,
+                "attachments": [],
+            }
+            for i in range(1, students + 1)
+        }
+        self.repositories = [f"classroom/assignment-s{i:05}" for i in range(students)]
+        self.releases: dict = {}
+        self.progress: dict = {}
+        self.migrations: dict = {}
+        self.files: dict = {}
+
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._level = 0.0
+        self._leaked_at = time.monotonic()
+        self._github_limit = github_limit
+        self._github_remaining = {"core": github_limit, "graphql": github_limit}
+        self._github_reset = int(time.time()) + 3600
+
+        self.routes = [
+            ("GET", CANVAS, r"/api/v1/courses/\d+/assignments/\d+/submissions", self._list_submissions),
+            ("GET", CANVAS, r"/api/v1/courses/\d+/students/submissions", self._list_submissions),
+            ("POST", CANVAS, r"/api/v1/courses/\d+/assignments/\d+/submissions/update_grades", self._update_grades),
+            ("PUT", CANVAS, r"/api/v1/courses/\d+/assignments/\d+/submissions/(\d+)", self._update_submission),
+            ("GET", CANVAS, r"/api/v1/progress/(\d+)", self._show_progress),
+            ("POST", CANVAS, r"/api/v1/courses/\d+/content_migrations", self._create_migration),
+            ("GET", CANVAS, r"/api/v1/courses/\d+/content_migrations/(\d+)", self._show_migration),
+            ("POST", UPLOADS, r"/files/(\d+)", self._upload_file),
+            ("GET", CANVAS, r"/api/v1/files/(\d+)", self._show_file),
+            ("POST", CANVAS, r"/api/graphql", self._graphql),
+            ("POST", GITHUB, r"/graphql", self._github_graphql),
+            ("GET", GITHUB, r"/assignments/\d+/accepted_assignments", self._accepted_assignments),
+            ("GET", GITHUB, r"/repos/([^/]+/[^/]+)/commits", self._commits),
+            ("GET", GITHUB, r"/repos/([^/]+/[^/]+)/releases/latest", self._latest_release),
+            ("POST", GITHUB, r"/repos/([^/]+/[^/]+)/releases", self._create_release),
+        ]  # fmt: skip
+
+    def transport(self):
+        return httpx.MockTransport(self.handle)
+
+    def async_transport(self):
+        return httpx.MockTransport(self.ahandle)
+
+    def handle(self, request: httpx.Request):
+        if self.latency:
+            time.sleep(self.latency)
+        return self._respond(request)
+
+    async def ahandle(self, request: httpx.Request):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._respond(request)
+
+    def _respond(self, request: httpx.Request):
+        with self._lock:
+            self.requests += 1
+
+            if request.url.host == CANVAS:
+                headers = self._drain()
+                if headers is None:
+                    self.throttled += 1
+                    return httpx.Response(
+                        403,
+                        text="403 Forbidden (Rate Limit Exceeded)",
+                        headers=self._canvas_headers(),
+                    )
+            else:
+                headers = {}
+
+            if self.error_rate and self._random.random() < self.error_rate:
+                self.errors += 1
+                return httpx.Response(503, headers=headers)
+
+            for method, host, pattern, handler in self.routes:
+                if method != request.method or host != request.url.host:
+                    continue
+                match = re.fullmatch(pattern, request.url.path)
+                if match:
+                    resp = handler(request, *match.groups())
+                    break
+            else:
+                resp = httpx.Response(404, json={"errors": [{"message": "not found"}]})
+
+            if request.url.host == GITHUB:
+                resource = "graphql" if request.url.path == "/graphql" else "core"
+                headers = self._github_headers(resp.status_code, resource)
+
+            resp.headers.update(headers)
+            return resp
+
+    def _drain(self):
+        now = time.monotonic()
+        self._level = max(0.0, self._level - (now - self._leaked_at) * self.leak_rate)
+        self._leaked_at = now
+
+        if self._level + self.cost > self.bucket:
+            return None
+
+        self._level += self.cost
+        return self._canvas_headers()
+
+    def _canvas_headers(self):
+        return {
+            "X-Rate-Limit-Remaining": f"{self.bucket - self._level:.3f}",
+            "X-Request-Cost": f"{self.cost:.3f}",
+        }
+
+    def _github_headers(self, status, resource):
+        remaining = self._github_remaining[resource]
+        if status != 304:
+            remaining = self._github_remaining[resource] = max(0, remaining - 1)
+        return {
+            "X-RateLimit-Limit": str(self._github_limit),
+            "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Used": str(self._github_limit - remaining),
+            "X-RateLimit-Reset": str(self._github_reset),
+            "X-RateLimit-Resource": resource,
+        }
+
+    def _paginate(self, request: httpx.Request, items, *, default=10):
+        params = request.url.params
+        per_page = int(params.get("per_page", default))
+        page = int(params.get("page", 1))
+        last = max(1, -(-len(items) // per_page))
+
+        links = {"current": page, "first": 1, "last": last}
+        if page < last:
+            links["next"] = page + 1
+        if page > 1:
+            links["prev"] = page - 1
+
+        link = ",".join(
+            '<{}>; rel="{}"'.format(request.url.copy_set_param("page", n), rel)
+            for rel, n in links.items()
+        )
+        start = (page - 1) * per_page
+        return httpx.Response(
+            200, json=items[start : start + per_page], headers={"Link": link}
+        )
+
+    def _list_submissions(self, request):
+        params = request.url.params
+        submitted_since = params.get("submitted_since")
+        graded_since = params.get("graded_since")
+        submissions = [
+            s
+            for s in self.submissions.values()
+            if (not submitted_since or (s["submitted_at"] or "") > submitted_since)
+            and (not graded_since or (s["graded_at"] or "") > graded_since)
+        ]
+        return self._paginate(request, submissions)
+
+    def _update_submission(self, request, user_id):
+        submission = self.submissions.get(int(user_id))
+        if submission is None:
+            return httpx.Response(404)
+
+        payload = json.loads(request.content or b"{}").get("submission", {})
+        if "posted_grade" in payload:
+            _grade(submission, payload["posted_grade"])
+        return httpx.Response(200, json=submission)
+
+    def _update_grades(self, request):
+        grade_data = json.loads(request.content)["grade_data"]
+        for user_id, data in grade_data.items():
+            submission = self.submissions.get(int(user_id))
+            if submission and "posted_grade" in data:
+                _grade(submission, data["posted_grade"])
+
+        progress_id = self._new_progress()
+        return httpx.Response(200, json=self._progress(progress_id))
+
+    def _new_progress(self, *, waiting=False):
+        progress_id = len(self.progress) + 1
+        self.progress[progress_id] = {
+            "id": progress_id,
+            "workflow_state": "queued",
+            "polls": 0,
+            "waiting": waiting,
+        }
+        return progress_id
+
+    def _progress(self, progress_id):
+        progress = self.progress[progress_id]
+        return {"id": progress_id, "workflow_state": progress["workflow_state"]}
+
+    def _show_progress(self, request, progress_id):
+        progress = self.progress.get(int(progress_id))
+        if progress is None:
+            return httpx.Response(404)
+
+        if progress["waiting"]:
+            return httpx.Response(200, json=self._progress(int(progress_id)))
+
+        progress["polls"] += 1
+        if progress["polls"] >= self.progress_polls:
+            progress["workflow_state"] = "completed"
+            for migration in self.migrations.values():
+                if migration["progress_id"] == progress["id"]:
+                    migration["workflow_state"] = "completed"
+        else:
+            progress["workflow_state"] = "running"
+        return httpx.Response(200, json=self._progress(int(progress_id)))
+
+    def _create_migration(self, request):
+        payload = json.loads(request.content)
+        pre_attachment = payload.get("pre_attachment") or {}
+
+        file_id = len(self.files) + 1
+        self.files[file_id] = {
+            "id": file_id,
+            "display_name": pre_attachment.get("name"),
+            "size": pre_attachment.get("size"),
+            "upload_status": "pending",
+        }
+
+        migration_id = len(self.migrations) + 1
+        progress_id = self._new_progress(waiting=True)
+        self.migrations[migration_id] = {
+            "id": migration_id,
+            "migration_type": payload["migration_type"],
+            "workflow_state": "pre_processing",
+            "attachment_id": file_id,
+            "progress_id": progress_id,
+            "progress_url": f"{self.canvas_url}/api/v1/progress/{progress_id}",
+        }
+        return httpx.Response(
+            200,
+            json={
+                **self.migrations[migration_id],
+                "pre_attachment": {
+                    "upload_url": f"https://{UPLOADS}/files/{file_id}",
+                    "upload_params": {"filename": pre_attachment.get("name")},
+                },
+            },
+        )
+
+    def _show_migration(self, request, migration_id):
+        migration = self.migrations.get(int(migration_id))
+        if migration is None:
+            return httpx.Response(404)
+        return httpx.Response(200, json=migration)
+
+    def _upload_file(self, request, file_id):
+        file = self.files.get(int(file_id))
+        if file is None or "Authorization" in request.headers:
+            return httpx.Response(400)
+
+        file["upload_status"] = "success"
+        for migration in self.migrations.values():
+            if migration["attachment_id"] == file["id"]:
+                migration["workflow_state"] = "running"
+                self.progress[migration["progress_id"]]["waiting"] = False
+
+        if self.upload_redirect:
+            return httpx.Response(
+                302, headers={"Location": f"{self.canvas_url}/api/v1/files/{file_id}"}
+            )
+        return httpx.Response(201, json=file)
+
+    def _show_file(self, request, file_id):
+        file = self.files.get(int(file_id))
+        if file is None:
+            return httpx.Response(404)
+        return httpx.Response(200, json=file)
+
+    def _graphql(self, request):
+        body = json.loads(request.content)
+        if "usersConnection" not in body["query"]:
+            return self._lookups(body["query"])
+
+        variables = body.get("variables") or {}
+        first = variables.get("first", 100)
+        offset = _offset(variables.get("after"))
+        nodes = self.students[offset : offset + first]
+        end = offset + len(nodes)
+
+        return httpx.Response(
+            200,
+            json={
+                "data": {
+                    "course": {
+                        "usersConnection": {
+                            "nodes": nodes,
+                            "pageInfo": {
+                                "endCursor": _cursor(end),
+                                "hasNextPage": end < len(self.students),
+                            },
+                        }
+                    }
+                }
+            },
+        )
+
+    def _lookups(self, query):
+        students = {student["_id"]: student for student in self.students}
+        data = {}
+        for alias, user_id in USER.findall(query):
+            data[alias] = students.get(user_id)
+
+        for alias, _, user_id in SUBMISSION.findall(query):
+            submission = self.submissions.get(int(user_id))
+            nodes = []
+            if submission:
+                nodes.append(
+                    {
+                        "_id": str(submission["id"]),
+                        "state": submission["workflow_state"],
+                        "score": submission["score"],
+                        "grade": submission["score"] and str(submission["score"]),
+                        "submittedAt": submission["submitted_at"],
+                        "gradedAt": submission["graded_at"],
+                        "attempt": submission["attempt"],
+                    }
+                )
+            data[alias] = {"submissionsConnection": {"nodes": nodes}}
+
+        if not data:
+            return httpx.Response(
+                200, json={"errors": [{"message": "unsupported query"}]}
+            )
+        return httpx.Response(200, json={"data": data})
+
+    def _github_graphql(self, request):
+        query = json.loads(request.content)["query"]
+        data, errors = {}, []
+        for alias, owner, name in REPOSITORY.findall(query):
+            full_name = f"{owner}/{name}"
+            if full_name not in self.repositories:
+                data[alias] = None
+                errors.append(
+                    {
+                        "path": [alias],
+                        "message": f"Could not resolve to a Repository with the"
+                        f" name '{full_name}'.",
+                    }
+                )
+                continue
+
+            head = {
+                "oid": hashlib.sha1(f"{full_name}:0".encode()).hexdigest(),
+                "committedDate": "2024-01-01T00:00:00Z",
+            }
+            release = self.releases.get(full_name)
+            data[alias] = {
+                "nameWithOwner": full_name,
+                "defaultBranchRef": {
+                    "name": "main",
+                    "target": {**head, "history": {"nodes": [head]}},
+                },
+                "latestRelease": release
+                and {
+                    "tagName": release.get("tag_name"),
+                    "name": release.get("name"),
+                    "createdAt": "2024-01-01T00:00:00Z",
+                    "tagCommit": {"oid": release.get("target_commitish")},
+                },
+            }
+
+        body = {"data": data}
+        if errors:
+            body["errors"] = errors
+        return httpx.Response(200, json=body)
+
+    def _accepted_assignments(self, request):
+        accepted = [
+            {"id": i, "repository": {"full_name": name}}
+            for i, name in enumerate(self.repositories)
+        ]
+        return self._paginate(request, accepted, default=30)
+
+    def _commits(self, request, full_name):
+        seed = int(hashlib.sha256(full_name.encode()).hexdigest()[:8], 16)
+        commits = [
+            {
+                "sha": hashlib.sha1(f"{full_name}:{i}".encode()).hexdigest(),
+                "commit": {"message": f"Commit {i}"},
+            }
+            for i in range(seed % 20 + 1)
+        ]
+        return self._paginate(request, commits, default=30)
+
+    def _latest_release(self, request, full_name):
+        release = self.releases.get(full_name)
+        if release is None:
+            return httpx.Response(404, json={"message": "Not Found"})
+
+        etag = '"{}"'.format(release["id"])
+        if request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304, headers={"ETag": etag})
+        return httpx.Response(200, json=release, headers={"ETag": etag})
+
+    def _create_release(self, request, full_name):
+        payload = json.loads(request.content)
+        release = {"id": len(self.releases) + 1, **payload}
+        self.releases[full_name] = release
+        return httpx.Response(201, json=release)
@@ -1,3 +1,12 @@
-from dotenv import load_dotenv
+import functools
 
-load_dotenv()
+
+@functools.cache
+def load_env():
+    """
+    Load environment variables from `.env`. Clients call this when they are
+    created, so that merely importing the package stays cheap.
+    """
+    from dotenv import load_dotenv
+
+    load_dotenv()
@@ -0,0 +1,182 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from fnmatch import fnmatch
+
+import httpx
+
+from .headers import DROPPED_HEADERS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    content BLOB NOT NULL,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_path ON responses (path);
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+"""
+
+
+class ResponseCache:
+    """
+    On-disk cache of GET responses, stored in SQLite.
+
+    Entries are keyed on the full request URL, including query parameters, and
+    on the identity of the access token, so that clients for different users
+    never share responses. An entry younger than the TTL of its endpoint is
+    served without contacting the server; an older one is revalidated with
+    `If-None-Match`/`If-Modified-Since`, and refreshed in place on `304`.
+
+    `ttl` maps glob patterns over the URL path to a TTL in seconds, e.g.
+    `{"/api/v1/users/*/profile": 86400}`. The first matching pattern wins and
+    unmatched paths use `default_ttl`. Once the stored content exceeds
+    `max_size` bytes, the least recently used entries are evicted.
+
+    Pass a cache as `cache` to `CanvasClient` or `GitHub`.
+    """
+
+    def __init__(self, path, *, ttl=None, default_ttl=0, max_size=256 * 2**20):
+        self.ttl = ttl or {}
+        self.default_ttl = default_ttl
+        self.max_size = max_size
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    @staticmethod
+    def key(request: httpx.Request):
+        token = request.headers.get("Authorization", "")
+        return hashlib.sha256("\n".join([token, str(request.url)]).encode()).hexdigest()
+
+    def ttl_for(self, path):
+        for pattern, ttl in self.ttl.items():
+            if fnmatch(path, pattern):
+                return ttl
+        return self.default_ttl
+
+    def lookup(self, request: httpx.Request):
+        """
+        Return `(response, fresh)` for a cached request, or `(None, False)`.
+        """
+        key = self.key(request)
+
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT status, headers, content, stored_at FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+
+            if not row:
+                return None, False
+
+            self._db.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?",
+                (time.time(), key),
+            )
+
+        status, headers, content, stored_at = row
+        resp = httpx.Response(
+            status, headers=json.loads(headers), content=content, request=request
+        )
+        fresh = time.time() - stored_at < self.ttl_for(request.url.path)
+        return resp, fresh
+
+    @staticmethod
+    def validators(resp: httpx.Response):
+        """
+        Conditional request headers for revalidating a cached response.
+        """
+        headers = {}
+        if "ETag" in resp.headers:
+            headers["If-None-Match"] = resp.headers["ETag"]
+        if "Last-Modified" in resp.headers:
+            headers["If-Modified-Since"] = resp.headers["Last-Modified"]
+        return headers
+
+    def store(self, resp: httpx.Response):
+        if resp.status_code != 200:
+            return
+
+        if "no-store" in resp.headers.get("Cache-Control", ""):
+            return
+
+        headers = [
+            (k, v) for k, v in resp.headers.items() if k.lower() not in DROPPED_HEADERS
+        ]
+        now = time.time()
+
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self.key(resp.request),
+                    resp.request.url.path,
+                    resp.status_code,
+                    json.dumps(headers),
+                    resp.content,
+                    now,
+                    now,
+                ),
+            )
+            self._evict()
+
+    def refresh(self, request: httpx.Request):
+        """
+        Mark a cached response as revalidated.
+        """
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?",
+                (now, now, self.key(request)),
+            )
+
+    def invalidate(self, path):
+        """
+        Drop cached responses for `path`, everything below it, and its
+        immediate parent collection.
+        """
+        path = path.rstrip("/")
+        parent = path.rsplit("/", 1)[0]
+
+        with self._lock, self._db:
+            self._db.execute(
+                "DELETE FROM responses"
+                " WHERE path IN (?, ?) OR substr(path, 1, length(?)) = ?",
+                (path, parent, path + "/", path + "/"),
+            )
+
+    def clear(self):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM responses")
+
+    def _evict(self):
+        (size,) = self._db.execute(
+            "SELECT COALESCE(SUM(LENGTH(content)), 0) FROM responses"
+        ).fetchone()
+
+        if size <= self.max_size:
+            return
+
+        rows = self._db.execute(
+            "SELECT key, LENGTH(content) FROM responses ORDER BY accessed_at"
+        ).fetchall()
+        evicted = []
+        for key, length in rows:
+            if size <= self.max_size:
+                break
+            evicted.append((key,))
+            size -= length
+
+        self._db.executemany("DELETE FROM responses WHERE key = ?", evicted)
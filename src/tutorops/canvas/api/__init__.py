@@ -1,4 +1,12 @@
 from .api import CanvasAPI
-from .client import CanvasClient
+from ...cache import ResponseCache
+from .client import AsyncCanvasClient, CanvasClient
+from .loader import GraphQLLoader
 
-__all__ = ["CanvasAPI", "CanvasClient"]
+__all__ = [
+    "AsyncCanvasClient",
+    "CanvasAPI",
+    "CanvasClient",
+    "GraphQLLoader",
+    "ResponseCache",
+]
@@ -1,6 +1,10 @@
+from concurrent.futures import ThreadPoolExecutor
+
 from .client import CanvasClient
 from .endpoint.assignments import AssignmentsApi
+from .endpoint.content_migrations import ContentMigrationsApi
 from .endpoint.files import FilesApi
+from .endpoint.progress import ProgressApi
 from .endpoint.quiz_submission_questions import QuizSubmissionQuestionsApi
 from .endpoint.quiz_submissions import QuizSubmissionsApi
 from .endpoint.rubrics import RubricsApi
@@ -30,10 +34,21 @@ class CanvasAPI:
 
         return AssignmentsApi(self.http, self.course_id)
 
+    @property
+    def content_migrations(self):
+        if not self.course_id:
+            raise ValueError("course_id is required")
+
+        return ContentMigrationsApi(self.http, self.course_id)
+
     @property
     def files(self):
         return FilesApi(self.http)
 
+    @property
+    def progress(self):
+        return ProgressApi(self.http)
+
     @property
     def quiz_submissions(self):
         if not self.course_id or not self.quiz_id:
@@ -69,21 +84,63 @@ class CanvasAPI:
         return self.http.post(url, json={"query": query, "variables": variables}).json()
 
     def list_active_students(self):
+        return list(self.iter_active_students())
+
+    def iter_active_students(
+        self,
+        fields=("_id", "name", "sisId", "integrationId"),
+        *,
+        page_size=100,
+        prefetch=False,
+    ):
+        """
+        Stream the active students of the course, paging through
+        `usersConnection` by cursor. With `prefetch`, the next page is
+        requested while the caller is still consuming the current one.
+        """
         query = """
-        query ListActiveStudents($course_id: ID!) {
+        query ListActiveStudents($course_id: ID!, $first: Int!, $after: String) {
           course(id: $course_id) {
             usersConnection(
+              first: $first
+              after: $after
               filter: {enrollmentTypes: StudentEnrollment, enrollmentStates: active}
             ) {
               nodes {
-                _id
-                name
-                sisId
-                integrationId
+                %s
+              }
+              pageInfo {
+                endCursor
+                hasNextPage
               }
             }
           }
         }
-        """
-        resp = self.graphql(query, {"course_id": self.course_id})
-        return resp["data"]["course"]["usersConnection"]["nodes"]
+        """ % " ".join(fields)
+
+        def fetch(after):
+            variables = {
+                "course_id": self.course_id,
+                "first": page_size,
+                "after": after,
+            }
+            resp = self.graphql(query, variables)
+            return resp["data"]["course"]["usersConnection"]
+
+        pool = ThreadPoolExecutor(1) if prefetch else None
+        try:
+            page = fetch(None)
+            while True:
+                info = page["pageInfo"]
+                upcoming = None
+                if pool and info["hasNextPage"]:
+                    upcoming = pool.submit(fetch, info["endCursor"])
+
+                yield from page["nodes"]
+
+                if not info["hasNextPage"]:
+                    break
+                page = upcoming.result() if upcoming else fetch(info["endCursor"])
+        finally:
+            if pool:
+                pool.shutdown(cancel_futures=True)
@@ -1,21 +1,90 @@
+import asyncio
+import contextlib
+import itertools
 import os
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import httpx
 
+from ... import load_env
+from ...cache import ResponseCache
+from ...cassette import Cassette
+from ...instrument import Instrumentation
+from .journal import Journal
+from .ratelimit import IDEMPOTENT, RateLimiter
+
+LINK = re.compile(r'<(?P<url>http\S+)>; rel="(?P<rel>\S+)"')
+
+
+def _items(resp, key):
+    return resp.json()[key] if key else resp.json()
+
+
+def _links(resp):
+    header = resp.headers.get("link")
+    if not header:
+        return {}
+
+    return {
+        k: v for v, k in (LINK.match(l.strip()).groups() for l in header.split(","))
+    }
+
+
+def _next(link):
+    return None if link.get("last") == link.get("current") else link.get("next")
+
+
+def _page_urls(link):
+    """
+    URLs of the pages after `current` up to `last`, or None if the pagination
+    is not numbered.
+    """
+    if "last" not in link or "current" not in link:
+        return None
+
+    last, current = httpx.URL(link["last"]), httpx.URL(link["current"])
+    last_page, current_page = last.params.get("page"), current.params.get("page")
+    if not (
+        last_page and last_page.isdigit() and current_page and current_page.isdigit()
+    ):
+        return None
+
+    return [
+        str(last.copy_set_param("page", page))
+        for page in range(int(current_page) + 1, int(last_page) + 1)
+    ]
+
 
 class CanvasClient:
     def __init__(
         self,
-        base_url=os.getenv("CANVAS_BASE_URL"),
-        token=os.getenv("CANVAS_TOKEN"),
+        base_url=None,
+        token=None,
+        *,
+        limiter: RateLimiter | None = None,
+        cache: ResponseCache | None = None,
+        journal: Journal | None = None,
+        instrument: Instrumentation | None = None,
+        transport: httpx.BaseTransport | None = None,
+        async_transport: httpx.AsyncBaseTransport | None = None,
+        cassette: Cassette | None = None,
     ):
+        load_env()
+        base_url = base_url or os.getenv("CANVAS_BASE_URL")
+        token = token or os.getenv("CANVAS_TOKEN")
+
         if not base_url:
             raise ValueError("CANVAS_BASE_URL is required")
 
         if not token:
             raise ValueError("CANVAS_TOKEN is required")
 
+        if cassette:
+            transport = cassette.transport(transport)
+            async_transport = cassette.async_transport(async_transport)
+
         self._http = httpx.Client(
             base_url=base_url,
             follow_redirects=True,
@@ -23,47 +92,333 @@ class CanvasClient:
                 "Authorization": "Bearer {}".format(token),
                 "Content-Type": "application/json",
             },
+            event_hooks=instrument.hooks() if instrument else None,
+            transport=transport,
+        )
+        self._uploads = httpx.Client(
+            timeout=None,
+            event_hooks=instrument.hooks() if instrument else None,
+            transport=transport,
         )
+        # Used by the async clients derived from this one.
+        self._async_transport = async_transport
+        self.instrument = instrument
+        self.limiter = limiter or RateLimiter()
+        self.cache = cache
+        self.journal = journal
+
+    def _send(self, method, url, **kwargs) -> httpx.Response:
+        for attempt in itertools.count():
+            try:
+                # Pace inside the slot, so that requests waiting for one are
+                # paced by the time they are sent rather than when they queued.
+                with self.limiter.slot():
+                    time.sleep(self.limiter.delay())
+                    sent_at = time.monotonic()
+                    resp = self._http.request(
+                        method, url, extensions={"attempt": attempt}, **kwargs
+                    )
+            except httpx.TransportError:
+                if method not in IDEMPOTENT or attempt >= self.limiter.max_retries:
+                    raise
+                time.sleep(self.limiter.backoff(attempt))
+                continue
+
+            self.limiter.update(resp, sent_at=sent_at)
+            if attempt >= self.limiter.max_retries or not self.limiter.should_retry(
+                method, resp
+            ):
+                break
+            time.sleep(self.limiter.backoff(attempt))
+
+        return resp
+
+    def _request(self, method, url, **kwargs) -> httpx.Response:
+        if self.cache and method != "GET":
+            self.cache.invalidate(httpx.URL(url).path)
+
+        resp = self._send(method, url, **kwargs)
+        resp.raise_for_status()
+        return resp
 
     def get(self, url, *, params=None) -> httpx.Response:
-        resp = self._http.request("GET", url, params=params)
+        if not self.cache:
+            return self._request("GET", url, params=params)
+
+        request = self._http.build_request("GET", url, params=params)
+        cached, fresh = self.cache.lookup(request)
+        if cached and fresh:
+            return cached
+
+        headers = self.cache.validators(cached) if cached else None
+        resp = self._send("GET", url, params=params, headers=headers)
+
+        if cached and resp.status_code == 304:
+            self.cache.refresh(request)
+            return cached
+
         resp.raise_for_status()
+        self.cache.store(resp)
         return resp
 
-    def paginated(self, url, *, key=None, params=None, per_page=10):
-        reg = re.compile(r'<(?P<url>http\S+)>; rel="(?P<rel>\S+)"')
+    def paginated(self, url, *, key=None, params=None, per_page=10, workers=0):
+        """
+        Iterate over the items of a paginated endpoint.
 
+        With `workers`, once the first page is in and its `last` link carries a
+        numeric page number, the remaining pages are fetched concurrently by
+        that many threads. Items are still yielded in page order. Bookmark
+        pagination cannot be predicted and is always walked sequentially.
+        """
         if not params:
             params = {}
 
         params["per_page"] = per_page
 
+        resp = self.get(url, params=params)
+        yield from _items(resp, key)
+
+        link = _links(resp)
+        pages = _page_urls(link) if workers else None
+
+        if pages:
+            pool = ThreadPoolExecutor(workers)
+            try:
+                for resp in pool.map(self.get, pages):
+                    yield from _items(resp, key)
+            finally:
+                pool.shutdown(cancel_futures=True)
+            return
+
+        # Link URLs already carry the full query string.
+        url = _next(link)
         while url:
-            resp = self.get(url, params=params)
+            resp = self.get(url)
+            yield from _items(resp, key)
+            url = _next(_links(resp))
 
-            data = resp.json()[key] if key else resp.json()
-            for item in data:
-                yield item
+    def _journaled(self, method, url, *, json=None, params=None):
+        """
+        Send a write through the journal, skipping it if it already landed.
+        """
+        request = self._http.build_request(method, url, params=params)
+        target, digest = str(request.url), self.journal.digest(json)
 
-            link = {
-                k: v
-                for v, k in (
-                    reg.match(l).groups() for l in resp.headers.get("link").split(",")
-                )
-            }
-            url = None if link["last"] == link["current"] else link["next"]
+        done, body = self.journal.lookup(method, target, digest)
+        if done:
+            return httpx.Response(200, json=body, request=request)
 
-    def post(self, url, *, data=None, json=None, params=None):
-        resp = self._http.request("POST", url, data=data, json=json, params=params)
-        resp.raise_for_status()
+        self.journal.begin(method, target, digest, json)
+        resp = self._request(method, url, json=json, params=params)
+        self.journal.ack(method, target, digest, resp.json())
         return resp
 
-    def put(self, url, *, data=None, json=None, params=None):
-        resp = self._http.request("PUT", url, data=data, json=json, params=params)
-        resp.raise_for_status()
-        return resp
+    def resume(self):
+        """
+        Re-send the journaled writes that were never acknowledged. Returns
+        `(method, url, result)` for each, where `result` is the response or the
+        exception raised for it, so that one failure does not stop the rest.
+        """
+        results = []
+        for method, url, payload in self.journal.pending():
+            try:
+                result = self._journaled(method, url, json=payload)
+            except Exception as e:
+                result = e
+            results.append((method, url, result))
+        return results
+
+    def post(self, url, *, data=None, json=None, params=None, journaled=False):
+        if journaled and self.journal:
+            return self._journaled("POST", url, json=json, params=params)
+        return self._request("POST", url, data=data, json=json, params=params)
+
+    def put(self, url, *, data=None, json=None, params=None, journaled=False):
+        if journaled and self.journal:
+            return self._journaled("PUT", url, json=json, params=params)
+        return self._request("PUT", url, data=data, json=json, params=params)
 
     def delete(self, url, *, params=None):
-        resp = self._http.request("DELETE", url, params=params)
+        return self._request("DELETE", url, params=params)
+
+    @contextlib.contextmanager
+    def stream(self, url, *, headers=None):
+        """
+        GET a response without reading its body, e.g. to download a file in
+        chunks. Unlike other requests, this does not retry.
+        """
+        time.sleep(self.limiter.delay())
+        sent_at = time.monotonic()
+        with self._http.stream("GET", url, headers=headers) as resp:
+            # Error bodies are small, and telling a throttle apart needs them.
+            if resp.is_error:
+                resp.read()
+            self.limiter.update(resp, sent_at=sent_at)
+            resp.raise_for_status()
+            yield resp
+
+    def upload(self, url, *, data=None, files=None) -> httpx.Response:
+        """
+        POST a multipart upload to a pre-signed upload URL. The Canvas token is
+        not sent, since the URL may point to a separate file store, and
+        redirects are returned rather than followed.
+        """
+        resp = self._uploads.post(url, data=data, files=files)
+        if not resp.is_redirect:
+            resp.raise_for_status()
+        return resp
+
+
+class AsyncCanvasClient:
+    def __init__(
+        self,
+        base_url=None,
+        token=None,
+        *,
+        concurrency=8,
+        limiter: RateLimiter | None = None,
+        journal: Journal | None = None,
+        instrument: Instrumentation | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+        cassette: Cassette | None = None,
+    ):
+        load_env()
+        base_url = base_url or os.getenv("CANVAS_BASE_URL")
+        token = token or os.getenv("CANVAS_TOKEN")
+
+        if not base_url:
+            raise ValueError("CANVAS_BASE_URL is required")
+
+        if not token:
+            raise ValueError("CANVAS_TOKEN is required")
+
+        if cassette:
+            transport = cassette.async_transport(transport)
+
+        self._http = httpx.AsyncClient(
+            base_url=base_url,
+            follow_redirects=True,
+            headers={
+                "Authorization": "Bearer {}".format(token),
+                "Content-Type": "application/json",
+            },
+            event_hooks=instrument.async_hooks() if instrument else None,
+            transport=transport,
+        )
+        self.instrument = instrument
+        self.limiter = limiter or RateLimiter(max_concurrency=concurrency)
+        self.journal = journal
+
+    @classmethod
+    def from_client(cls, client: CanvasClient, *, concurrency=8):
+        """
+        Create an async client sharing the base URL and token of `client`.
+        """
+        token = client._http.headers["Authorization"].removeprefix("Bearer ")
+        limiter = RateLimiter(
+            max_concurrency=concurrency,
+            threshold=client.limiter.threshold,
+            leak_rate=client.limiter.leak_rate,
+            max_retries=client.limiter.max_retries,
+            base_delay=client.limiter.base_delay,
+            max_delay=client.limiter.max_delay,
+        )
+        return cls(
+            str(client._http.base_url),
+            token,
+            limiter=limiter,
+            journal=client.journal,
+            instrument=client.instrument,
+            transport=client._async_transport,
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        await self._http.aclose()
+
+    async def _request(self, method, url, **kwargs) -> httpx.Response:
+        for attempt in itertools.count():
+            try:
+                async with self.limiter.aslot():
+                    await asyncio.sleep(self.limiter.delay())
+                    sent_at = time.monotonic()
+                    resp = await self._http.request(
+                        method, url, extensions={"attempt": attempt}, **kwargs
+                    )
+            except httpx.TransportError:
+                if method not in IDEMPOTENT or attempt >= self.limiter.max_retries:
+                    raise
+                await asyncio.sleep(self.limiter.backoff(attempt))
+                continue
+
+            self.limiter.update(resp, sent_at=sent_at)
+            if attempt >= self.limiter.max_retries or not self.limiter.should_retry(
+                method, resp
+            ):
+                break
+            await asyncio.sleep(self.limiter.backoff(attempt))
+
         resp.raise_for_status()
         return resp
+
+    async def get(self, url, *, params=None) -> httpx.Response:
+        return await self._request("GET", url, params=params)
+
+    async def paginated(self, url, *, key=None, params=None, per_page=10):
+        if not params:
+            params = {}
+
+        params["per_page"] = per_page
+
+        resp = await self.get(url, params=params)
+        while True:
+            for item in _items(resp, key):
+                yield item
+
+            # Link URLs already carry the full query string.
+            url = _next(_links(resp))
+            if not url:
+                break
+            resp = await self.get(url)
+
+    async def _journaled(self, method, url, *, json=None, params=None):
+        request = self._http.build_request(method, url, params=params)
+        target, digest = str(request.url), self.journal.digest(json)
+
+        done, body = self.journal.lookup(method, target, digest)
+        if done:
+            return httpx.Response(200, json=body, request=request)
+
+        self.journal.begin(method, target, digest, json)
+        resp = await self._request(method, url, json=json, params=params)
+        self.journal.ack(method, target, digest, resp.json())
+        return resp
+
+    async def post(self, url, *, data=None, json=None, params=None, journaled=False):
+        if journaled and self.journal:
+            return await self._journaled("POST", url, json=json, params=params)
+        return await self._request("POST", url, data=data, json=json, params=params)
+
+    async def put(self, url, *, data=None, json=None, params=None, journaled=False):
+        if journaled and self.journal:
+            return await self._journaled("PUT", url, json=json, params=params)
+        return await self._request("PUT", url, data=data, json=json, params=params)
+
+    async def delete(self, url, *, params=None):
+        return await self._request("DELETE", url, params=params)
+
+    async def gather(self, calls):
+        """
+        Await `(key, awaitable)` pairs concurrently, bounded by the client's
+        concurrency limit. Returns a dict mapping each key to its result, or to
+        the exception it raised, so that one failure does not abort the batch.
+        """
+        calls = list(calls)
+        keys, aws = zip(*calls) if calls else ((), ())
+        results = await asyncio.gather(*aws, return_exceptions=True)
+        return dict(zip(keys, results))
@@ -0,0 +1,40 @@
+from typing import Any, Dict, Optional
+
+from ..client import CanvasClient
+
+
+class ContentMigrationsApi:
+    def __init__(self, canvas: CanvasClient, course_id) -> None:
+        self.canvas = canvas
+        self.course_id = course_id
+
+    def create(
+        self,
+        migration_type: str,
+        *,
+        pre_attachment: Optional[Dict[str, Any]] = None,
+        settings: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Create a content migration
+        https://canvas.instructure.com/doc/api/content_migrations.html#method.content_migrations.create
+        """
+        url = f"/api/v1/courses/{self.course_id}/content_migrations"
+
+        payload: dict[str, Any] = {"migration_type": migration_type}
+
+        if pre_attachment:
+            payload["pre_attachment"] = pre_attachment
+
+        if settings:
+            payload["settings"] = settings
+
+        return self.canvas.post(url, json=payload).json()
+
+    def show(self, migration_id):
+        """
+        Get a content migration
+        https://canvas.instructure.com/doc/api/content_migrations.html#method.content_migrations.show
+        """
+        url = f"/api/v1/courses/{self.course_id}/content_migrations/{migration_id}"
+        return self.canvas.get(url).json()
@@ -1,3 +1,5 @@
+import os
+
 from ..client import CanvasClient
 
 
@@ -12,3 +14,26 @@ class FilesApi:
         """
         url = f"/api/v1/files/{file_id}"
         return self.canvas.get(url).json()
+
+    def upload(self, pre_attachment, path):
+        """
+        Upload a file for a pending attachment and confirm it.
+        https://canvas.instructure.com/doc/api/file.file_uploads.html
+
+        `pre_attachment` holds the `upload_url` and `upload_params` returned
+        when the upload was requested. The file is streamed from disk in
+        chunks rather than read into memory.
+        """
+        with open(path, "rb") as f:
+            resp = self.canvas.upload(
+                pre_attachment["upload_url"],
+                data=pre_attachment["upload_params"],
+                files={"file": (os.path.basename(path), f)},
+            )
+
+        if resp.is_redirect:
+            return self.canvas.get(resp.headers["Location"]).json()
+
+        if resp.headers.get("Content-Type", "").startswith("application/json"):
+            return resp.json()
+        return self.canvas.get(resp.headers["Location"]).json()
@@ -0,0 +1,35 @@
+import time
+
+from ..client import CanvasClient
+
+
+class ProgressApi:
+    def __init__(self, canvas: CanvasClient) -> None:
+        self.canvas = canvas
+
+    def show(self, progress_id):
+        """
+        Query progress
+        https://canvas.instructure.com/doc/api/progress.html#method.progress.show
+        """
+        url = f"/api/v1/progress/{progress_id}"
+        return self.canvas.get(url).json()
+
+    def wait(self, progress_id, *, interval=1.0, max_interval=30.0, timeout=None):
+        """
+        Poll a progress until it has completed or failed, doubling the polling
+        interval up to `max_interval`. Raises `TimeoutError` after `timeout`
+        seconds.
+        """
+        deadline = timeout and time.monotonic() + timeout
+
+        while True:
+            progress = self.show(progress_id)
+            if progress["workflow_state"] in ("completed", "failed"):
+                return progress
+
+            if deadline and time.monotonic() + interval > deadline:
+                raise TimeoutError(f"progress {progress_id} did not finish in time")
+
+            time.sleep(interval)
+            interval = min(max_interval, interval * 2)
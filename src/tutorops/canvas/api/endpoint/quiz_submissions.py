@@ -13,4 +13,5 @@ class QuizSubmissionsApi:
         https://canvas.instructure.com/doc/api/quiz_submissions.html#method.quizzes/quiz_submissions_api.update
         """
         url = f"/api/v1/courses/{self.course_id}/quizzes/{self.quiz_id}/submissions/{quiz_submission_id}"
-        return self.canvas.put(url, json={"quiz_submissions": [payload]}).json()
+        payload = {"quiz_submissions": [payload]}
+        return self.canvas.put(url, json=payload, journaled=True).json()
@@ -134,7 +134,7 @@ class RubricsApi:
             },
         }
 
-        return self.canvas.post(url, json=payload).json()
+        return self.canvas.post(url, json=payload, journaled=True).json()
 
     def update_single_rubric_assessment(
         self,
@@ -159,4 +159,4 @@ class RubricsApi:
             }
         }
 
-        return self.canvas.put(url, json=payload).json()
+        return self.canvas.put(url, json=payload, journaled=True).json()
@@ -1,4 +1,7 @@
-from ..client import CanvasClient
+import asyncio
+
+from ..client import AsyncCanvasClient, CanvasClient
+from .progress import ProgressApi
 
 
 class SubmissionsApi:
@@ -20,6 +23,7 @@ class SubmissionsApi:
         user=False,
         group=False,
         read_status=False,
+        workers=0,
     ):
         """
         List assignment submissions
@@ -45,6 +49,52 @@ class SubmissionsApi:
             url,
             params={"include[]": include},
             per_page=per_page,
+            workers=workers,
+        )
+
+    def list_for_students(
+        self,
+        student_ids="all",
+        per_page=100,
+        *,
+        submitted_since=None,
+        graded_since=None,
+        submission_history=True,
+        submission_comments=False,
+        rubric_assessment=False,
+        workers=0,
+    ):
+        """
+        List submissions for multiple assignments, restricted to this assignment.
+        https://canvas.instructure.com/doc/api/submissions.html#method.submissions_api.for_students
+        """
+        url = f"/api/v1/courses/{self.course_id}/students/submissions"
+        include = [
+            k
+            for k in [
+                submission_history and "submission_history",
+                submission_comments and "submission_comments",
+                rubric_assessment and "rubric_assessment",
+            ]
+            if k
+        ]
+        params = {
+            "student_ids[]": student_ids,
+            "assignment_ids[]": [self.assignment_id],
+            "include[]": include,
+        }
+
+        if submitted_since:
+            params["submitted_since"] = submitted_since
+
+        if graded_since:
+            params["graded_since"] = graded_since
+
+        return self.canvas.paginated(
+            url,
+            params=params,
+            per_page=per_page,
+            workers=workers,
         )
 
     def get_single_submission_courses(
@@ -87,4 +137,59 @@ class SubmissionsApi:
         https://canvas.instructure.com/doc/api/submissions.html#method.submissions_api.update
         """
         url = f"/api/v1/courses/{self.course_id}/assignments/{self.assignment_id}/submissions/{user_id}"
-        return self.canvas.put(url, json=payload).json()
+        return self.canvas.put(url, json=payload, journaled=True).json()
+
+    def bulk_update_grades(self, grade_data, *, chunk_size=100, **wait):
+        """
+        Grade or comment on multiple submissions.
+        https://canvas.instructure.com/doc/api/submissions.html#method.submissions_api.bulk_update
+
+        `grade_data` maps user IDs to their `posted_grade`, `text_comment`, etc.
+        The map is submitted in chunks of `chunk_size` students, each of which
+        Canvas processes as a background job. The jobs are then polled until they
+        finish, with `wait` passed on to `ProgressApi.wait`. Returns a dict
+        mapping each user ID to the final `workflow_state` of its job.
+        """
+        url = f"/api/v1/courses/{self.course_id}/assignments/{self.assignment_id}/submissions/update_grades"
+        items = list(dict(grade_data).items())
+
+        jobs = []
+        for i in range(0, len(items), chunk_size):
+            chunk = items[i : i + chunk_size]
+            payload = {"grade_data": {str(user_id): data for user_id, data in chunk}}
+            progress = self.canvas.post(url, json=payload).json()
+            jobs.append((chunk, progress))
+
+        progress_api = ProgressApi(self.canvas)
+        result = {}
+        for chunk, progress in jobs:
+            progress = progress_api.wait(progress["id"], **wait)
+            for user_id, _ in chunk:
+                result[user_id] = progress["workflow_state"]
+
+        return result
+
+    def update_many(self, updates, *, concurrency=8):
+        """
+        Grade or comment on many submissions concurrently.
+
+        `updates` is an iterable of `(user_id, payload)` pairs, with payloads as
+        accepted by `update`. Returns a dict mapping each user ID to the updated
+        submission, or to the exception raised for that user.
+        """
+        return asyncio.run(self.aupdate_many(updates, concurrency=concurrency))
+
+    async def aupdate_many(self, updates, *, concurrency=8):
+        url = f"/api/v1/courses/{self.course_id}/assignments/{self.assignment_id}/submissions/{{}}"
+
+        async with AsyncCanvasClient.from_client(
+            self.canvas, concurrency=concurrency
+        ) as http:
+
+            async def update(user_id, payload):
+                resp = await http.put(url.format(user_id), json=payload, journaled=True)
+                return resp.json()
+
+            return await http.gather(
+                (user_id, update(user_id, payload)) for user_id, payload in updates
+            )
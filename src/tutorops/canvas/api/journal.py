@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+import threading
+
+from .ratelimit import IDEMPOTENT
+
+
+class Journal:
+    """
+    Append-only JSONL journal of write requests.
+
+    A journaled write is recorded as pending before it is sent, and as
+    acknowledged together with its response once Canvas has accepted it.
+    Payloads are content-hashed: a PUT whose payload matches the last one
+    acknowledged for the same URL, or a POST identical to one acknowledged
+    before, is not sent again and its recorded response is returned instead.
+    A run that died halfway can therefore simply be started again, and
+    `pending` lists the writes that were sent but never acknowledged. For
+    PUT and DELETE, an acknowledged write supersedes every earlier pending
+    one to the same URL, so an older payload is never re-sent over it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+        self._lock = threading.Lock()
+        self._latest: dict = {}
+        self._responses: dict = {}
+        self._pending: dict = {}
+
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        self._apply(json.loads(line))
+
+        self._file = open(path, "a", encoding="utf-8")
+
+    def close(self):
+        self._file.close()
+
+    @staticmethod
+    def digest(payload):
+        data = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(data.encode()).hexdigest()
+
+    def lookup(self, method, url, digest):
+        """
+        Return `(True, response)` if this write was already acknowledged,
+        otherwise `(False, None)`.
+        """
+        with self._lock:
+            if method in IDEMPOTENT and self._latest.get((method, url)) != digest:
+                return False, None
+
+            key = (method, url, digest)
+            if key not in self._responses:
+                return False, None
+
+            return True, self._responses[key]
+
+    def begin(self, method, url, digest, payload):
+        self._append(
+            {
+                "state": "pending",
+                "method": method,
+                "url": url,
+                "digest": digest,
+                "json": payload,
+            }
+        )
+
+    def ack(self, method, url, digest, response):
+        self._append(
+            {
+                "state": "acked",
+                "method": method,
+                "url": url,
+                "digest": digest,
+                "response": response,
+            }
+        )
+
+    def pending(self):
+        """
+        Writes that were sent but never acknowledged, as `(method, url, payload)`.
+        """
+        with self._lock:
+            return [
+                (entry["method"], entry["url"], entry["json"])
+                for entry in self._pending.values()
+            ]
+
+    def _append(self, entry):
+        with self._lock:
+            self._apply(entry)
+            self._file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            self._file.flush()
+
+    def _apply(self, entry):
+        key = (entry["method"], entry["url"], entry["digest"])
+
+        if entry["state"] == "pending":
+            self._pending[key] = entry
+            return
+
+        if entry["method"] in IDEMPOTENT:
+            # Anything still pending for the URL was superseded by this write.
+            for pending in [k for k in self._pending if k[:2] == key[:2]]:
+                del self._pending[pending]
+        else:
+            self._pending.pop(key, None)
+
+        self._latest[key[:2]] = key[2]
+        self._responses[key] = entry["response"]
@@ -0,0 +1,156 @@
+import asyncio
+import json
+
+from .client import AsyncCanvasClient
+
+
+class GraphQLError(Exception):
+    pass
+
+
+def literal(value):
+    """
+    Quote a value as a GraphQL string literal.
+    """
+    return json.dumps(str(value))
+
+
+class GraphQLLoader:
+    """
+    Batch per-key GraphQL lookups into aliased queries, DataLoader-style.
+    https://canvas.instructure.com/doc/api/file.graphql.html
+
+    `field` renders the GraphQL field that looks up one key, and `unwrap`
+    optionally post-processes its data. Keys requested within `window` seconds
+    of the first pending one (by default, within the same event loop tick) are
+    sent together as one query per `chunk_size` keys, and each caller receives
+    the data for its own key. Results are memoized per loader; failures are
+    not, so a key that failed is fetched again on its next load.
+    """
+
+    def __init__(
+        self,
+        client: AsyncCanvasClient,
+        field,
+        *,
+        unwrap=None,
+        chunk_size=50,
+        window=0.0,
+    ):
+        self.client = client
+        self.field = field
+        self.unwrap = unwrap
+        self.chunk_size = chunk_size
+        self.window = window
+
+        self._futures: dict = {}
+        self._pending: dict = {}
+        self._tasks: set = set()
+
+    def load(self, key) -> asyncio.Future:
+        if key in self._futures:
+            return self._futures[key]
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._futures[key] = future
+
+        if not self._pending:
+            if self.window:
+                loop.call_later(self.window, self._dispatch)
+            else:
+                loop.call_soon(self._dispatch)
+        self._pending[key] = future
+
+        return future
+
+    async def load_many(self, keys):
+        return await asyncio.gather(*(self.load(key) for key in keys))
+
+    def clear(self, key=None):
+        if key is None:
+            self._futures.clear()
+        else:
+            self._futures.pop(key, None)
+
+    def _dispatch(self):
+        batch, self._pending = list(self._pending.items()), {}
+
+        for i in range(0, len(batch), self.chunk_size):
+            task = asyncio.ensure_future(self._fetch(batch[i : i + self.chunk_size]))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _fetch(self, batch):
+        aliases = {f"k{i}": item for i, item in enumerate(batch)}
+        query = "query {{\n{}\n}}".format(
+            "\n".join(
+                f"  {alias}: {self.field(key)}" for alias, (key, _) in aliases.items()
+            )
+        )
+
+        try:
+            resp = (
+                await self.client.post("/api/graphql", json={"query": query})
+            ).json()
+        except Exception as e:
+            for key, future in batch:
+                self._futures.pop(key, None)
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        data = resp.get("data") or {}
+        errors = {}
+        for error in resp.get("errors") or []:
+            path = error.get("path") or [None]
+            errors.setdefault(path[0], error.get("message"))
+
+        for alias, (key, future) in aliases.items():
+            if future.done():
+                continue
+
+            if alias in errors or (alias not in data and errors):
+                message = errors.get(alias) or next(iter(errors.values()))
+                self._futures.pop(key, None)
+                future.set_exception(GraphQLError(message))
+                continue
+
+            value = data.get(alias)
+            future.set_result(self.unwrap(value) if self.unwrap else value)
+
+
+def user_loader(client: AsyncCanvasClient, selection="_id name sisId", **kwargs):
+    """
+    Load users by ID.
+    """
+
+    def field(user_id):
+        return "legacyNode(_id: {}, type: User) {{ ... on User {{ {} }} }}".format(
+            literal(user_id), selection
+        )
+
+    return GraphQLLoader(client, field, **kwargs)
+
+
+def submission_loader(
+    client: AsyncCanvasClient,
+    assignment_id,
+    selection="_id state score grade submittedAt gradedAt attempt",
+    **kwargs,
+):
+    """
+    Load the submission of each user ID for one assignment.
+    """
+
+    def field(user_id):
+        return (
+            "assignment(id: {}) {{ submissionsConnection(filter: {{userId: {}}}) "
+            "{{ nodes {{ {} }} }} }}"
+        ).format(literal(assignment_id), literal(user_id), selection)
+
+    def unwrap(assignment):
+        nodes = (assignment or {}).get("submissionsConnection", {}).get("nodes")
+        return nodes[0] if nodes else None
+
+    return GraphQLLoader(client, field, unwrap=unwrap, **kwargs)
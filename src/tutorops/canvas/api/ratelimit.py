@@ -0,0 +1,170 @@
+import asyncio
+import random
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+import httpx
+
+IDEMPOTENT = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+class RateLimiter:
+    """
+    Adaptive scheduling against the Canvas leaky bucket.
+    https://canvas.instructure.com/doc/api/file.throttling.html
+
+    The bucket level is tracked from the `X-Rate-Limit-Remaining` and
+    `X-Request-Cost` response headers. The number of requests allowed in flight
+    follows AIMD: it grows by one per window of successful responses and halves
+    when Canvas throttles or the remaining quota drops below `threshold`, in
+    which case requests are also paced until the bucket has leaked back. It
+    halves at most once per window of responses, since the responses to
+    requests already in flight report the same congestion. For the same
+    reason, only responses to requests sent after the last throttle can lift
+    the pacing again.
+
+    Throttled requests are always retried, since Canvas rejected them before
+    doing any work. Server errors and transport errors are only retried for
+    idempotent methods. Retries wait with full-jitter exponential backoff.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_concurrency=8,
+        threshold=150.0,
+        leak_rate=10.0,
+        max_retries=5,
+        base_delay=1.0,
+        max_delay=60.0,
+    ):
+        self.max_concurrency = max_concurrency
+        self.threshold = threshold
+        self.leak_rate = leak_rate
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self.concurrency = float(max_concurrency)
+        self.remaining: float | None = None
+        self.cost: float | None = None
+        self.throttled = 0
+
+        self._responses = 0
+        self._decreased_at: int | None = None
+        self._throttled_at: float | None = None
+        self._inflight = 0
+        self._next_at = 0.0
+        self._cond = threading.Condition()
+        self._acond: asyncio.Condition | None = None
+
+    @property
+    def window(self):
+        return max(1, int(self.concurrency))
+
+    def update(self, resp: httpx.Response, *, sent_at=None):
+        """
+        Feed a response back into the bucket estimate and concurrency window.
+        `sent_at` is the `time.monotonic()` at which its request was sent.
+        """
+        remaining = resp.headers.get("X-Rate-Limit-Remaining")
+        cost = resp.headers.get("X-Request-Cost")
+
+        stale = (
+            sent_at is not None
+            and self._throttled_at is not None
+            and sent_at < self._throttled_at
+        )
+        if remaining is not None:
+            remaining = float(remaining)
+            # A response to a request sent before the last throttle may report
+            # a fuller bucket than there is now; only trust it going down.
+            if not stale or self.remaining is None or remaining < self.remaining:
+                self.remaining = remaining
+
+        if cost is not None:
+            self.cost = float(cost)
+
+        self._responses += 1
+        throttled = self.is_throttled(resp)
+        if throttled:
+            self.throttled += 1
+
+        if throttled or (
+            self.remaining is not None and self.remaining < self.threshold
+        ):
+            self._throttled_at = time.monotonic()
+            if (
+                self._decreased_at is None
+                or self._responses - self._decreased_at >= self.window
+            ):
+                self._decreased_at = self._responses
+                self.concurrency = max(1.0, self.concurrency / 2)
+        else:
+            self.concurrency = min(
+                float(self.max_concurrency), self.concurrency + 1 / self.window
+            )
+
+    def delay(self):
+        """
+        Seconds to wait before issuing the next request.
+
+        Below `threshold`, requests are spaced so that they arrive no faster
+        than the bucket leaks. Each call reserves the next free send time.
+        """
+        with self._cond:
+            now = time.monotonic()
+            if self.remaining is None or self.remaining >= self.threshold:
+                self._next_at = now
+                return 0.0
+
+            start = max(now, self._next_at)
+            self._next_at = start + (self.cost or 1.0) / self.leak_rate
+            return min(self.max_delay, start - now)
+
+    def backoff(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    @staticmethod
+    def is_throttled(resp: httpx.Response):
+        if resp.status_code == 429:
+            return True
+
+        return resp.status_code == 403 and b"Rate Limit Exceeded" in resp.content
+
+    def should_retry(self, method, resp: httpx.Response):
+        if self.is_throttled(resp):
+            return True
+
+        return resp.status_code >= 500 and method in IDEMPOTENT
+
+    @contextmanager
+    def slot(self):
+        with self._cond:
+            while self._inflight >= self.window:
+                self._cond.wait()
+            self._inflight += 1
+
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._inflight -= 1
+                self._cond.notify_all()
+
+    @asynccontextmanager
+    async def aslot(self):
+        if self._acond is None:
+            self._acond = asyncio.Condition()
+
+        async with self._acond:
+            await self._acond.wait_for(lambda: self._inflight < self.window)
+            self._inflight += 1
+
+        try:
+            yield
+        finally:
+            async with self._acond:
+                self._inflight -= 1
+                self._acond.notify_all()
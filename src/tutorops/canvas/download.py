@@ -0,0 +1,140 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable
+
+import httpx
+
+from .api.client import CanvasClient
+
+
+@dataclass(frozen=True)
+class Download:
+    url: str
+    path: str
+    size: int | None = None
+    updated_at: str | None = None
+
+    @property
+    def mtime(self):
+        if not self.updated_at:
+            return None
+        return datetime.fromisoformat(
+            self.updated_at.replace("Z", "+00:00")
+        ).timestamp()
+
+    def is_done(self):
+        """
+        Whether the file is already on disk with the expected size and
+        modification time.
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+
+        if self.size is not None and stat.st_size != self.size:
+            return False
+        return self.mtime is None or stat.st_mtime == self.mtime
+
+
+def attachment_downloads(submissions: Iterable[dict], directory):
+    """
+    Downloads for the attachments of submissions as listed by
+    `SubmissionsApi.index`, saved as `<directory>/<user_id>/<id>_<filename>`.
+    """
+    for submission in submissions:
+        for attachment in submission.get("attachments") or []:
+            yield Download(
+                url=attachment["url"],
+                path=os.path.join(
+                    directory,
+                    str(submission["user_id"]),
+                    "{}_{}".format(attachment["id"], attachment["filename"]),
+                ),
+                size=attachment.get("size"),
+                updated_at=attachment.get("updated_at"),
+            )
+
+
+class DownloadManager:
+    """
+    Download files through `CanvasClient`, streaming each one to disk in
+    chunks of `chunk_size` bytes with up to `workers` files at once.
+
+    Files already on disk with a matching size and `updated_at` are skipped.
+    A file is written to `<path>.part` first and moved into place once
+    complete. If a download breaks off, it is resumed with a `Range` request
+    from where the partial file ends, both on retry and on a later run.
+    Throttled requests and server errors are retried like other GETs.
+    Canvas gives a changed file a new attachment, so a partial file never
+    belongs to another version of the same attachment.
+    """
+
+    def __init__(self, client: CanvasClient, *, workers=4, chunk_size=1 << 20):
+        self.client = client
+        self.workers = workers
+        self.chunk_size = chunk_size
+
+    def download(self, download: Download):
+        """
+        Download one file. Returns False if it was skipped, otherwise True.
+        """
+        if download.is_done():
+            return False
+
+        os.makedirs(os.path.dirname(download.path) or ".", exist_ok=True)
+        part = download.path + ".part"
+        limiter = self.client.limiter
+
+        for attempt in range(limiter.max_retries + 1):
+            try:
+                self._fetch(download.url, part)
+                break
+            except httpx.TransportError:
+                if attempt >= limiter.max_retries:
+                    raise
+                time.sleep(limiter.backoff(attempt))
+            except httpx.HTTPStatusError as e:
+                if attempt >= limiter.max_retries or not limiter.should_retry(
+                    "GET", e.response
+                ):
+                    raise
+                time.sleep(limiter.backoff(attempt))
+
+        os.replace(part, download.path)
+        if download.mtime is not None:
+            os.utime(download.path, (download.mtime, download.mtime))
+        return True
+
+    def _fetch(self, url, part):
+        offset = os.path.getsize(part) if os.path.exists(part) else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else None
+
+        try:
+            with self.client.stream(url, headers=headers) as resp:
+                # A server that ignores the range sends the whole file again.
+                with open(part, "ab" if resp.status_code == 206 else "wb") as f:
+                    for chunk in resp.iter_bytes(self.chunk_size):
+                        f.write(chunk)
+        except httpx.HTTPStatusError as e:
+            # The partial file no longer fits the file; start over.
+            if e.response.status_code != 416 or not offset:
+                raise
+            os.remove(part)
+            self._fetch(url, part)
+
+    def run(self, downloads: Iterable[Download]):
+        """
+        Download files concurrently. Yields each download with True once it
+        was downloaded, False if it was skipped, or the exception raised for
+        it, in completion order.
+        """
+        with ThreadPoolExecutor(self.workers) as pool:
+            futures = {
+                pool.submit(self.download, download): download for download in downloads
+            }
+            for future in as_completed(futures):
+                yield futures[future], future.exception() or future.result()
@@ -1,4 +1,7 @@
-from .interop import create_question_bank
+from .cache import ItemCache
+from .importer import import_question_banks
+from .interop import create_question_bank, write_question_bank
+from .parallel import build_question_banks
 from .question import (
     EssayQuestion,
     FileUploadQuestion,
@@ -7,12 +10,16 @@ from .question import (
 )
 
 __all__ = [
+    "build_question_banks",
     "create_question_bank",
     "EssayQuestion",
     "FileUploadQuestion",
     "FillInMultipleBlanksQuestion",
+    "import_question_banks",
+    "ItemCache",
     "ShortAnswerQuestion",
     "Nice",
+    "write_question_bank",
 ]
 
 
@@ -0,0 +1,34 @@
+import os
+import tempfile
+
+
+class ItemCache:
+    """
+    Serialized question items on disk, keyed by question digest.
+
+    Since a question's ident is derived from its digest, a cached item is
+    exactly what serializing the same question again would produce.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, digest):
+        return os.path.join(self.directory, digest[:2], f"{digest}.xml")
+
+    def get(self, digest):
+        try:
+            with open(self._path(digest), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, digest, fragment: bytes):
+        path = self._path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(fragment)
+        os.replace(tmp, path)
@@ -0,0 +1,88 @@
+import os
+import re
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Mapping
+
+from ..api import CanvasAPI
+from .interop import write_question_bank
+from .question import Question
+
+MANIFEST = """<?xml version="1.0" encoding="utf-8"?>
+<manifest identifier="{ident}" xmlns="http://www.imsglobal.org/xsd/imscp_v1p1">
+  <organizations/>
+  <resources>
+    <resource identifier="{ident}_bank" type="imsqti_xmlv1p2" href="{href}">
+      <file href="{href}"/>
+    </resource>
+  </resources>
+</manifest>
+"""
+
+PROGRESS_ID = re.compile(r"/progress/(\d+)")
+
+
+def package_question_bank(out, bank_title, questions: Iterable[Question], **kwargs):
+    """
+    Write a question bank into a QTI zip package that Canvas can import.
+    Keyword arguments are passed on to `write_question_bank`.
+    """
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as package:
+        with package.open("bank.xml", "w") as f:
+            write_question_bank(f, bank_title, questions, **kwargs)
+
+        package.writestr(
+            "imsmanifest.xml", MANIFEST.format(ident="tutorops", href="bank.xml")
+        )
+
+
+def import_question_bank(
+    api: CanvasAPI, bank_title, questions: Iterable[Question], **wait
+):
+    """
+    Package a question bank, upload it to the course of `api` as a QTI content
+    migration and wait for the migration to finish. Returns its final progress.
+    Keyword arguments are passed on to `ProgressApi.wait`.
+    https://canvas.instructure.com/doc/api/content_migrations.html
+    """
+    fd, path = tempfile.mkstemp(suffix=".zip")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            package_question_bank(f, bank_title, questions)
+
+        migration = api.content_migrations.create(
+            "qti_converter",
+            pre_attachment={
+                "name": f"{bank_title}.zip",
+                "size": os.path.getsize(path),
+            },
+            settings={"question_bank_name": bank_title},
+        )
+        api.files.upload(migration["pre_attachment"], path)
+    finally:
+        os.remove(path)
+
+    progress_id = PROGRESS_ID.search(migration["progress_url"]).group(1)
+    return api.progress.wait(progress_id, **wait)
+
+
+def import_question_banks(
+    api: CanvasAPI, banks: Mapping[str, Iterable[Question]], *, workers=4, **wait
+):
+    """
+    Import question banks, given as a map of title to questions, with up to
+    `workers` banks being packaged, uploaded or migrated at once. Returns a
+    map of title to the final progress of its migration, or the exception
+    raised while importing it.
+    """
+    with ThreadPoolExecutor(workers) as pool:
+        futures = {
+            title: pool.submit(import_question_bank, api, title, questions, **wait)
+            for title, questions in banks.items()
+        }
+
+    return {
+        title: future.exception() or future.result()
+        for title, future in futures.items()
+    }
@@ -1,23 +1,243 @@
-from typing import Iterable
-from uuid import uuid1
+import contextlib
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+from typing import BinaryIO, Iterable
+from xml.sax.saxutils import escape
 
-from . import binding
+from .cache import ItemCache
+from .lazy import binding
 from .question import Question
+from .render import render_item
 
 
-def create_question_bank(bank_title, questions: Iterable[Question]):
-    bank = binding.objectbank(ident=str(uuid1()))
-
-    bank.append(
-        binding.qtimetadata(
-            binding.qtimetadatafield(
-                fieldlabel="bank_title",
-                fieldentry=bank_title,
-            ),
-        )
+def _bank_metadata(bank_title):
+    return binding.qtimetadata(
+        binding.qtimetadatafield(
+            fieldlabel="bank_title",
+            fieldentry=bank_title,
+        ),
     )
 
+
+def _fragment(element) -> bytes:
+    """
+    Serialize one element as it appears inside a document, i.e. without the
+    default namespace declaration that a standalone DOM puts on its root.
+    """
+    root = element.toDOM().documentElement
+    root.removeAttribute("xmlns")
+    return root.toxml("utf-8")
+
+
+def bank_ident(bank_title, digests: Iterable[str]):
+    """
+    Stable ident of a bank, derived from its title and its items in order.
+    """
+    h = hashlib.sha256(bank_title.encode())
+    for digest in digests:
+        h.update(b"\n" + digest.encode())
+    return h.hexdigest()[:32]
+
+
+def _unique(questions: Iterable[Question]):
+    """
+    Drop repeated questions, pairing each remaining one with its digest.
+    """
+    seen = set()
     for question in questions:
+        digest = question.digest
+        if digest not in seen:
+            seen.add(digest)
+            yield digest, question
+
+
+def create_question_bank(bank_title, questions: Iterable[Question], *, ident=None):
+    questions = list(_unique(questions))
+    ident = ident or bank_ident(bank_title, (digest for digest, _ in questions))
+
+    bank = binding.objectbank(ident=ident)
+
+    bank.append(_bank_metadata(bank_title))
+
+    for _, question in questions:
         bank.append(question.xml)
 
     return binding.questestinterop(bank)
+
+
+def serialize_question(
+    question: Question,
+    *,
+    backend="binding",
+    validate=False,
+    cache: ItemCache | None = None,
+):
+    """
+    Serialize the item of one question, as it appears inside a bank.
+    """
+    assert backend in ("binding", "template")
+
+    fragment = cache.get(question.digest) if cache else None
+    if fragment:
+        return fragment
+
+    if backend == "template":
+        fragment = render_item(question, validate=validate)
+    fragment = fragment or _fragment(question.xml)
+
+    if cache:
+        cache.put(question.digest, fragment)
+    return fragment
+
+
+def _header(bank_title, ident) -> bytes:
+    return b"".join(
+        [
+            b'<?xml version="1.0" encoding="utf-8"?>',
+            b'<questestinterop xmlns="%s">' % binding.Namespace.uri().encode(),
+            b'<objectbank ident="%s">' % escape(ident, {'"': "&quot;"}).encode(),
+            _fragment(_bank_metadata(bank_title)),
+        ]
+    )
+
+
+FOOTER = b"</objectbank></questestinterop>"
+
+IDENT = re.compile(rb'<objectbank ident="([^"]*)">')
+
+
+def read_bank_ident(path):
+    """
+    Ident of the bank written at `path`, or None if there is none.
+    """
+    try:
+        with open(path, "rb") as f:
+            match = IDENT.search(f.read(4096))
+    except FileNotFoundError:
+        return None
+    return match and match.group(1).decode()
+
+
+def write_fragments(out: BinaryIO, bank_title, fragments: Iterable[bytes], *, ident):
+    """
+    Write a question bank made of already serialized items.
+    """
+    out.write(_header(bank_title, ident))
+
+    for fragment in fragments:
+        out.write(fragment)
+
+    out.write(FOOTER)
+
+
+@contextlib.contextmanager
+def _replacing(path):
+    """
+    Open a temporary file next to `path`, moved over it once written, so that
+    an interrupted write never leaves a partial file at `path`.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.fspath(path)) or ".")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            yield f
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def write_bank(out: str | os.PathLike | BinaryIO, bank_title, items, *, ident=None):
+    """
+    Write `(digest, item)` pairs as a question bank to a path or binary stream.
+
+    Unless `ident` is given, the bank ident depends on every item, so the
+    items are spooled to a temporary file before the header is written. A
+    path is written through a temporary file and moved into place; if it
+    already holds a bank with the same ident, it is left untouched and False
+    is returned, otherwise True.
+    """
+    is_path = isinstance(out, (str, os.PathLike))
+
+    if ident:
+        if is_path and read_bank_ident(out) == ident:
+            return False
+
+        fragments = (fragment for _, fragment in items)
+        if not is_path:
+            write_fragments(out, bank_title, fragments, ident=ident)
+            return True
+
+        with _replacing(out) as f:
+            write_fragments(f, bank_title, fragments, ident=ident)
+        return True
+
+    with tempfile.TemporaryFile() as body:
+        digests = []
+        for digest, fragment in items:
+            digests.append(digest)
+            body.write(fragment)
+
+        ident = bank_ident(bank_title, digests)
+        if is_path and read_bank_ident(out) == ident:
+            return False
+
+        body.seek(0)
+        with _replacing(out) if is_path else contextlib.nullcontext(out) as f:
+            f.write(_header(bank_title, ident))
+            shutil.copyfileobj(body, f)
+            f.write(FOOTER)
+        return True
+
+
+def write_question_bank(
+    out: str | os.PathLike | BinaryIO,
+    bank_title,
+    questions: Iterable[Question],
+    *,
+    ident=None,
+    backend="binding",
+    validate=False,
+    cache: ItemCache | None = None,
+):
+    """
+    Serialize a question bank to a path or binary stream, item by item.
+
+    The output is byte-for-byte what `create_question_bank(...).toxml("utf-8")`
+    produces, but only one question is built and serialized at a time, and
+    repeated questions are written once.
+
+    Unless `ident` is given, the bank ident is derived from the title and the
+    question digests, which are known without serializing anything. When
+    writing to a path that already holds a bank with that ident, the path is
+    left untouched, nothing is serialized and False is returned; otherwise
+    True. The questions are read twice, once for the ident and once to write
+    them, so the questions of a one-shot iterator are first collected with
+    their digests. A path is only replaced once the whole bank is written.
+
+    With `backend="template"`, the built-in question types are rendered from
+    templates instead of through the binding (see `render.render_item`), and
+    `validate` checks each rendered item against the binding. With `cache`,
+    items of previously serialized questions are read back from the cache.
+    """
+    # Questions and digests of a one-shot iterator, which is read twice.
+    pairs = list(_unique(questions)) if iter(questions) is questions else None
+
+    ident = ident or bank_ident(
+        bank_title, (digest for digest, _ in pairs or _unique(questions))
+    )
+    if isinstance(out, (str, os.PathLike)) and read_bank_ident(out) == ident:
+        return False
+
+    items = (
+        (
+            digest,
+            serialize_question(
+                question, backend=backend, validate=validate, cache=cache
+            ),
+        )
+        for digest, question in pairs or _unique(questions)
+    )
+    return write_bank(out, bank_title, items, ident=ident)
@@ -0,0 +1,24 @@
+import importlib
+
+
+class LazyBinding:
+    """
+    Stand-in for the generated `binding` module, which is large and slow to
+    import. The module is imported, and set as PyXB's default namespace, on
+    first attribute access; after that its attributes are looked up directly.
+    """
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+
+        import pyxb.utils.domutils
+
+        module = importlib.import_module(".binding", __package__)
+        pyxb.utils.domutils.BindingDOMSupport.SetDefaultNamespace(module.Namespace)
+
+        self.__dict__.update(vars(module))
+        return getattr(module, name)
+
+
+binding = LazyBinding()
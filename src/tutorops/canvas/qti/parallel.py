@@ -0,0 +1,153 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from .cache import ItemCache
+from .interop import bank_ident, read_bank_ident, serialize_question, write_bank
+
+
+def _digest(factory, index):
+    return factory(index).digest
+
+
+def _build(factory, index, *, backend, cache):
+    question = factory(index)
+    return question.digest, serialize_question(question, backend=backend, cache=cache)
+
+
+def serialize_questions(
+    factory,
+    count,
+    *,
+    workers=None,
+    backend="template",
+    cache: ItemCache | None = None,
+    chunksize=64,
+):
+    """
+    Build and serialize `factory(0)` to `factory(count - 1)` across a process
+    pool, yielding `(digest, item)` pairs in index order. Repeated questions
+    are yielded once.
+
+    `factory` is called in the worker processes, so it must be picklable,
+    e.g. a module-level function, and should derive any randomness from the
+    index it is given so that the output does not depend on scheduling.
+    """
+    seen = set()
+    with ProcessPoolExecutor(workers) as pool:
+        for digest, fragment in pool.map(
+            partial(_build, factory, backend=backend, cache=cache),
+            range(count),
+            chunksize=chunksize,
+        ):
+            if digest not in seen:
+                seen.add(digest)
+                yield digest, fragment
+
+
+def build_question_banks(
+    path,
+    bank_title,
+    factory,
+    count,
+    *,
+    max_items=None,
+    max_bytes=None,
+    workers=None,
+    backend="template",
+    cache: ItemCache | None = None,
+):
+    """
+    Build `count` questions in parallel and write them as question banks.
+
+    Without limits, a single bank is written to `path`. With `max_items` or
+    `max_bytes` (counting serialized items), the questions are split into as
+    many banks as needed to stay under the limits, written to `path` formatted
+    with the 1-based shard number (e.g. `"bank-{}.xml"`) and titled
+    `"{bank_title} ({shard})"`. Banks whose content did not change are left
+    untouched. Unless `max_bytes` is given, which makes the split depend on
+    the serialized items, the questions are digested first and only the banks
+    that changed are serialized. Returns the paths of all banks.
+    """
+    if not max_bytes:
+        return _build_by_digest(
+            path,
+            bank_title,
+            factory,
+            count,
+            max_items=max_items,
+            workers=workers,
+            backend=backend,
+            cache=cache,
+        )
+
+    items = serialize_questions(
+        factory, count, workers=workers, backend=backend, cache=cache
+    )
+
+    paths = []
+    items = iter(items)
+    pending = next(items, None)
+
+    while pending is not None:
+        shard = len(paths) + 1
+        paths.append(os.fspath(path).format(shard))
+
+        def take():
+            nonlocal pending
+            count, size = 0, 0
+            while pending is not None:
+                if count and (
+                    (max_items and count >= max_items)
+                    or (max_bytes and size + len(pending[1]) > max_bytes)
+                ):
+                    return
+                yield pending
+                count, size = count + 1, size + len(pending[1])
+                pending = next(items, None)
+
+        write_bank(paths[-1], f"{bank_title} ({shard})", take())
+
+    return paths
+
+
+def _build_by_digest(
+    path, bank_title, factory, count, *, max_items, workers, backend, cache
+):
+    """
+    Split questions into banks of `max_items` by their digests, and serialize
+    only the banks whose ident changed.
+    """
+    with ProcessPoolExecutor(workers) as pool:
+        first = {}
+        for index, digest in enumerate(
+            pool.map(partial(_digest, factory), range(count), chunksize=64)
+        ):
+            first.setdefault(digest, index)
+        unique = list(first.items())
+
+        if not max_items:
+            shards = [(os.fspath(path), bank_title, unique)]
+        else:
+            shards = [
+                (
+                    os.fspath(path).format(shard),
+                    f"{bank_title} ({shard})",
+                    unique[start : start + max_items],
+                )
+                for shard, start in enumerate(range(0, len(unique), max_items), 1)
+            ]
+
+        for shard_path, title, questions in shards:
+            ident = bank_ident(title, (digest for digest, _ in questions))
+            if read_bank_ident(shard_path) == ident:
+                continue
+
+            items = pool.map(
+                partial(_build, factory, backend=backend, cache=cache),
+                [index for _, index in questions],
+                chunksize=64,
+            )
+            write_bank(shard_path, title, items, ident=ident)
+
+    return [shard_path for shard_path, _, _ in shards]
@@ -1,10 +1,21 @@
+import hashlib
+import json
 from typing import Iterable
 
-import pyxb.utils.domutils
+from .lazy import binding
 
-from . import binding
 
-pyxb.utils.domutils.BindingDOMSupport.SetDefaultNamespace(binding.Namespace)
+def _canonical(value):
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    raise TypeError(f"cannot hash {type(value).__name__}")
+
+
+def answer_ident(blank, answer):
+    """
+    Stable ident of an answer choice, unique within its item.
+    """
+    return hashlib.sha256(f"{blank}\n{answer}".encode()).hexdigest()[:16]
 
 
 class Question:
@@ -18,6 +29,22 @@ class Question:
         self.html = html
         self.points_possible = points
 
+    @property
+    def digest(self):
+        """
+        Hash of the question's content, stable across runs and processes.
+        """
+        data = json.dumps(
+            {"class": type(self).__qualname__, **vars(self)},
+            sort_keys=True,
+            default=_canonical,
+        )
+        return hashlib.sha256(data.encode()).hexdigest()
+
+    @property
+    def ident(self):
+        return self.digest[:32]
+
     @property
     def qtimetadata(self):
         return binding.qtimetadata(
@@ -45,7 +72,7 @@ class Question:
 
     @property
     def xml(self):
-        root = binding.item(ident=hex(id(self)), title=self.title)
+        root = binding.item(ident=self.ident, title=self.title)
         root.append(binding.itemmetadata(self.qtimetadata))
         root.append(self.presentation)
 
@@ -111,9 +138,9 @@ class FillInMultipleBlanksQuestion(Question):
                                 binding.material(
                                     binding.mattext(ans, texttype="text/plain")
                                 ),
-                                ident=hex(id(ans)),
+                                ident=answer_ident(ident, ans),
                             )
-                            for ans in answers
+                            for ans in sorted(answers)
                         )
                     ),
                     ident="response_{}".format(ident),
@@ -145,7 +172,7 @@ class ShortAnswerQuestion(EssayQuestion):
                 binding.conditionvar(
                     *(
                         binding.varequal(answer, respident="response1")
-                        for answer in self.answers
+                        for answer in sorted(self.answers)
                     )
                 ),
                 binding.setvar(
@@ -0,0 +1,164 @@
+from xml.sax.saxutils import escape
+
+from .lazy import binding
+from .question import (
+    EssayQuestion,
+    FileUploadQuestion,
+    FillInMultipleBlanksQuestion,
+    Question,
+    ShortAnswerQuestion,
+    answer_ident,
+)
+
+# Templates for the items of the built-in question types, laid out as the
+# binding serializes them. Placeholders are filled with escaped text.
+ITEM = (
+    '<item ident="{ident}" title="{title}">'
+    "<itemmetadata><qtimetadata>"
+    "<qtimetadatafield>"
+    "<fieldlabel>question_type</fieldlabel><fieldentry>{question_type}</fieldentry>"
+    "</qtimetadatafield>"
+    "<qtimetadatafield>"
+    "<fieldlabel>points_possible</fieldlabel><fieldentry>{points}</fieldentry>"
+    "</qtimetadatafield>"
+    "</qtimetadata></itemmetadata>"
+    "<presentation>"
+    '<material><mattext texttype="text/html">{html}</mattext></material>'
+    "{responses}"
+    "</presentation>"
+    "{resprocessing}"
+    "</item>"
+)
+
+RESPONSE_STR = (
+    '<response_str rcardinality="Single" ident="response1">'
+    '<render_fib><response_label rshuffle="No" ident="answer1"/></render_fib>'
+    "</response_str>"
+)
+
+RESPONSE_LID = (
+    '<response_lid ident="response_{ident}">'
+    "<material><mattext>{ident}</mattext></material>"
+    "{render_choice}"
+    "</response_lid>"
+)
+
+CHOICE = (
+    '<response_label ident="{ident}">'
+    '<material><mattext texttype="text/plain">{text}</mattext></material>'
+    "</response_label>"
+)
+
+RESPROCESSING = (
+    "<resprocessing>"
+    "<outcomes>"
+    '<decvar varname="SCORE" vartype="Decimal" minvalue="0" maxvalue="1"/>'
+    "</outcomes>"
+    '<respcondition continue="No">'
+    "{conditionvar}"
+    '<setvar varname="SCORE" action="Set">1</setvar>'
+    "</respcondition>"
+    "</resprocessing>"
+)
+
+VAREQUAL = '<varequal respident="response1">{answer}</varequal>'
+
+
+def _escape(value):
+    return escape(str(value), {'"': "&quot;"})
+
+
+def _container(tag, content):
+    return f"<{tag}>{content}</{tag}>" if content else f"<{tag}/>"
+
+
+def _item(question: Question, responses="", resprocessing=""):
+    return ITEM.format(
+        ident=_escape(question.ident),
+        title=_escape(question.title),
+        question_type=_escape(question.question_type),
+        points=_escape(question.points_possible),
+        html=_escape(question.html),
+        responses=responses,
+        resprocessing=resprocessing,
+    )
+
+
+def _file_upload(question: FileUploadQuestion):
+    return _item(question)
+
+
+def _essay(question: EssayQuestion):
+    return _item(question, RESPONSE_STR)
+
+
+def _short_answer(question: ShortAnswerQuestion):
+    conditions = "".join(
+        VAREQUAL.format(answer=_escape(answer)) for answer in sorted(question.answers)
+    )
+    return _item(
+        question,
+        RESPONSE_STR,
+        RESPROCESSING.format(conditionvar=_container("conditionvar", conditions)),
+    )
+
+
+def _fill_in_multiple_blanks(question: FillInMultipleBlanksQuestion):
+    responses = "".join(
+        RESPONSE_LID.format(
+            ident=_escape(ident),
+            render_choice=_container(
+                "render_choice",
+                "".join(
+                    CHOICE.format(
+                        ident=_escape(answer_ident(ident, ans)), text=_escape(ans)
+                    )
+                    for ans in sorted(answers)
+                ),
+            ),
+        )
+        for ident, answers in question.answers.items()
+    )
+    return _item(question, responses)
+
+
+RENDERERS = {
+    EssayQuestion: _essay,
+    FileUploadQuestion: _file_upload,
+    FillInMultipleBlanksQuestion: _fill_in_multiple_blanks,
+    ShortAnswerQuestion: _short_answer,
+}
+
+
+def validate_item(fragment: bytes):
+    """
+    Parse a serialized item with the binding, raising if it is not valid QTI.
+    """
+    document = b"".join(
+        [
+            b'<questestinterop xmlns="%s">' % binding.Namespace.uri().encode(),
+            b'<objectbank ident="_">',
+            fragment,
+            b"</objectbank></questestinterop>",
+        ]
+    )
+    return binding.CreateFromDocument(document)
+
+
+def render_item(question: Question, *, validate=False) -> bytes:
+    """
+    Serialize the item of a question straight from templates, skipping the
+    binding. Only the exact built-in question types are templated; anything
+    else, including subclasses that may override the item structure, returns
+    None. With `validate`, the output is checked against the binding.
+    """
+    renderer = RENDERERS.get(type(question))
+    if renderer is None:
+        return None
+
+    fragment = renderer(question).encode()
+
+    if validate:
+        validate_item(fragment)
+
+    return fragment
@@ -0,0 +1,144 @@
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from .api import CanvasAPI
+
+_DONE = object()
+
+
+def _drain(inbox: queue.Queue):
+    while inbox.get() is not _DONE:
+        pass
+
+
+def _stage(fn, inbox: queue.Queue, outbox: queue.Queue, workers, downstream, stop=None):
+    """
+    Run `fn` over the items of `inbox` on `workers` threads, putting results
+    into `outbox`. Once every worker has seen its end marker, `downstream` end
+    markers are passed on. Failures travel downstream in place of results.
+    Once `stop` is set, items are passed on without running `fn`.
+    """
+    remaining = [workers]
+    lock = threading.Lock()
+
+    def work():
+        while (item := inbox.get()) is not _DONE:
+            key, value = item
+            if not isinstance(value, Exception) and not (stop and stop.is_set()):
+                try:
+                    value = fn(key, value)
+                except Exception as e:
+                    value = e
+            outbox.put((key, value))
+
+        with lock:
+            remaining[0] -= 1
+            if not remaining[0]:
+                for _ in range(downstream):
+                    outbox.put(_DONE)
+
+    for _ in range(workers):
+        threading.Thread(target=work, daemon=True).start()
+
+
+class RegradePipeline:
+    """
+    Regrade quiz submissions in three overlapping stages.
+
+    Questions are fetched through `QuizSubmissionQuestionsApi.index`, scored by
+    `score(quiz_submission_id, attempt, questions)`, and written back through
+    `QuizSubmissionsApi.update`. `score` returns the `questions` map of the
+    update payload (question ID to `score` and `comment`), or None to leave the
+    submission untouched.
+
+    Each stage has its own number of workers, and stages hand over through
+    queues of at most `queue_size` items, so a slow stage holds back the ones
+    before it instead of letting work pile up in memory. With `processes`,
+    scoring runs in a process pool, in which case `score` must be picklable.
+    """
+
+    def __init__(
+        self,
+        api: CanvasAPI,
+        score,
+        *,
+        fetch_workers=4,
+        score_workers=2,
+        write_workers=4,
+        queue_size=16,
+        processes=False,
+    ):
+        self.api = api
+        self.score = score
+        self.fetch_workers = fetch_workers
+        self.score_workers = score_workers
+        self.write_workers = write_workers
+        self.queue_size = queue_size
+        self.processes = processes
+
+    def run(self, submissions):
+        """
+        Regrade `(quiz_submission_id, attempt)` pairs. Yields each pair with the
+        updated quiz submission, None if it was left untouched, or the exception
+        raised for it, in completion order. An exception raised while iterating
+        `submissions` is raised once the pairs before it have been yielded.
+        Stopping early lets the submissions in flight go without regrading them.
+        """
+        questions_api = self.api.quiz_submission_questions
+        submissions_api = self.api.quiz_submissions
+        pool = ProcessPoolExecutor(self.score_workers) if self.processes else None
+
+        def fetch(key, _):
+            return questions_api.index(*key)
+
+        def score(key, questions):
+            if pool:
+                return pool.submit(self.score, *key, questions).result()
+            return self.score(*key, questions)
+
+        def write(key, questions):
+            if questions is None:
+                return None
+            payload = {"attempt": key[1], "questions": questions}
+            return submissions_api.update(key[0], payload)
+
+        inbox, fetched, scored, written = (
+            queue.Queue(self.queue_size) for _ in range(4)
+        )
+        stop = threading.Event()
+        _stage(fetch, inbox, fetched, self.fetch_workers, self.score_workers, stop)
+        _stage(score, fetched, scored, self.score_workers, self.write_workers, stop)
+        _stage(write, scored, written, self.write_workers, 1, stop)
+
+        failure = []
+
+        def feed():
+            try:
+                for key in submissions:
+                    if stop.is_set():
+                        break
+                    inbox.put((tuple(key), None))
+            except Exception as e:
+                failure.append(e)
+            finally:
+                for _ in range(self.fetch_workers):
+                    inbox.put(_DONE)
+
+        threading.Thread(target=feed, daemon=True).start()
+
+        done = False
+        try:
+            while (item := written.get()) is not _DONE:
+                yield item
+            done = True
+        finally:
+            if not done:
+                # Let the stages run dry so none stays blocked on a full queue.
+                stop.set()
+                threading.Thread(target=_drain, args=(written,), daemon=True).start()
+            if pool:
+                pool.shutdown(cancel_futures=True)
+
+        if failure:
+            raise failure[0]
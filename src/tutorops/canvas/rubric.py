@@ -0,0 +1,255 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from .api import CanvasAPI
+from .api.endpoint.submissions import SubmissionsApi
+
+
+@dataclass
+class Criterion:
+    id: str
+    description: str
+    points: float
+    # Rating ID by description, and points by rating ID.
+    ratings: dict = field(default_factory=dict)
+    rating_points: dict = field(default_factory=dict)
+
+
+def _normalize(entry):
+    return {
+        "points": None if entry.get("points") is None else float(entry["points"]),
+        "rating_id": (
+            None if entry.get("rating_id") is None else str(entry["rating_id"])
+        ),
+        "comments": entry.get("comments") or "",
+    }
+
+
+class RubricGrader:
+    """
+    Grade many submissions against one rubric, writing only what changed.
+
+    The rubric is fetched once, with its associations and existing
+    assessments, and indexed by criterion and rating. Existing assessments
+    refer to submissions, which are listed once to find their users. Grades
+    are given per user as a map of criterion (ID or description) to a rating
+    (ID, description or points) or to a dict with `points`, `rating` and
+    `comments`. Each user's assessment is compared with the existing one,
+    and only the users whose points, rating or comments differ are written,
+    with up to `workers` requests at once, creating or updating as needed.
+
+    Canvas replaces an assessment as a whole, so a changed assessment is sent
+    in full.
+    """
+
+    def __init__(
+        self,
+        api: CanvasAPI,
+        rubric_id,
+        *,
+        association_id=None,
+        assessment_type="grading",
+        workers=8,
+    ):
+        assert assessment_type in ("grading", "peer_review", "provisional_grade")
+
+        self.api = api
+        self.rubric_id = rubric_id
+        self.association_id = association_id or api.assignment_id
+        self.assessment_type = assessment_type
+        self.workers = workers
+
+        self.criteria: dict[str, Criterion] = {}
+        self.rubric_association_id = None
+        # Assessment ID and normalized data of the existing assessment per user.
+        self.assessments: dict = {}
+
+        self._by_description: dict = {}
+
+    def load(self):
+        rubric = self.api.rubrics.get_single_rubric_courses(
+            self.rubric_id, assessments=True, associations=True, style="full"
+        )
+
+        self.criteria.clear()
+        self._by_description.clear()
+        for data in rubric.get("data") or []:
+            criterion = Criterion(
+                id=str(data["id"]),
+                description=data.get("description") or "",
+                points=float(data.get("points") or 0),
+            )
+            for rating in data.get("ratings") or []:
+                criterion.ratings[rating.get("description") or ""] = str(rating["id"])
+                criterion.rating_points[str(rating["id"])] = float(rating["points"])
+            self.criteria[criterion.id] = criterion
+            self._by_description[criterion.description] = criterion
+
+        associations = [
+            association
+            for association in rubric.get("associations") or []
+            if association.get("association_type") == "Assignment"
+            and str(association.get("association_id")) == str(self.association_id)
+        ]
+        if not associations:
+            raise ValueError(
+                f"rubric {self.rubric_id} is not associated with assignment"
+                f" {self.association_id}"
+            )
+        self.rubric_association_id = associations[0]["id"]
+
+        assessments = [
+            assessment
+            for assessment in rubric.get("assessments") or []
+            if str(assessment.get("rubric_association_id"))
+            == str(self.rubric_association_id)
+            and assessment.get("assessment_type") == self.assessment_type
+            and assessment.get("artifact_type") == "Submission"
+        ]
+
+        # Assessments point at submissions; map those back to their users.
+        users = {}
+        if assessments:
+            submissions = SubmissionsApi(
+                self.api.http, self.api.course_id, self.association_id
+            )
+            users = {
+                str(submission["id"]): str(submission["user_id"])
+                for submission in submissions.index(submission_history=False)
+            }
+
+        self.assessments.clear()
+        for assessment in assessments:
+            user_id = users.get(str(assessment["artifact_id"]))
+            if user_id is None:
+                continue
+
+            self.assessments[user_id] = (
+                assessment["id"],
+                {
+                    str(entry["criterion_id"]): _normalize(entry)
+                    for entry in assessment.get("data") or []
+                    if entry.get("criterion_id")
+                },
+            )
+
+        return self
+
+    def criterion(self, key) -> Criterion:
+        criterion = self.criteria.get(str(key)) or self._by_description.get(key)
+        if criterion is None:
+            raise KeyError(f"unknown criterion {key!r}")
+        return criterion
+
+    def resolve(self, grades):
+        """
+        Turn grades keyed by criterion into the assessment payload Canvas
+        expects, keyed by `criterion_<id>`.
+        """
+        assessment = {}
+        for key, grade in grades.items():
+            criterion = self.criterion(key)
+            if not isinstance(grade, dict):
+                grade = {"rating": grade}
+
+            entry = {}
+            rating = grade.get("rating")
+            if isinstance(rating, (int, float)):
+                entry["points"] = float(rating)
+            elif rating is not None:
+                rating_id = criterion.ratings.get(rating, str(rating))
+                if rating_id not in criterion.rating_points:
+                    raise KeyError(
+                        f"unknown rating {rating!r} for {criterion.description!r}"
+                    )
+                entry["rating_id"] = rating_id
+                entry["points"] = criterion.rating_points[rating_id]
+
+            if grade.get("points") is not None:
+                entry["points"] = float(grade["points"])
+            if grade.get("comments"):
+                entry["comments"] = grade["comments"]
+
+            assessment[f"criterion_{criterion.id}"] = entry
+        return assessment
+
+    def diff(self, user_id, assessment):
+        """
+        Criterion IDs whose points, rating or comments differ from the existing
+        assessment of a user, including criteria the new assessment leaves
+        blank, or all of them if there is none.
+        """
+        existing = self.assessments.get(str(user_id))
+        if existing is None:
+            return sorted(key.removeprefix("criterion_") for key in assessment)
+
+        _, data = existing
+        new = {
+            key.removeprefix("criterion_"): _normalize(entry)
+            for key, entry in assessment.items()
+        }
+        blank = _normalize({})
+        return sorted(
+            criterion_id
+            for criterion_id in new.keys() | data.keys()
+            if new.get(criterion_id, blank) != data.get(criterion_id, blank)
+        )
+
+    def write(self, user_id, assessment):
+        rubrics = self.api.rubrics
+        existing = self.assessments.get(str(user_id))
+
+        if existing is None:
+            result = rubrics.create_single_rubric_assessment(
+                self.rubric_association_id, user_id, self.assessment_type, assessment
+            )
+        else:
+            result = rubrics.update_single_rubric_assessment(
+                self.rubric_association_id,
+                existing[0],
+                user_id,
+                self.assessment_type,
+                assessment,
+            )
+
+        self.assessments[str(user_id)] = (
+            result.get("id", existing and existing[0]),
+            {
+                key.removeprefix("criterion_"): _normalize(entry)
+                for key, entry in assessment.items()
+            },
+        )
+        return result
+
+    def grade(self, grades_by_user):
+        """
+        Write the assessments of the users whose grades changed. Returns a map
+        of user ID to the written assessment, None if it was unchanged, or the
+        exception raised for it.
+        """
+        if self.rubric_association_id is None:
+            self.load()
+
+        results = {}
+        changed = {}
+        for user_id, grades in grades_by_user.items():
+            try:
+                assessment = self.resolve(grades)
+            except KeyError as e:
+                results[user_id] = e
+                continue
+
+            if self.diff(user_id, assessment):
+                changed[user_id] = assessment
+            else:
+                results[user_id] = None
+
+        with ThreadPoolExecutor(self.workers) as pool:
+            futures = {
+                user_id: pool.submit(self.write, user_id, assessment)
+                for user_id, assessment in changed.items()
+            }
+
+        for user_id, future in futures.items():
+            results[user_id] = future.exception() or future.result()
+        return results
@@ -0,0 +1,146 @@
+import json
+import sqlite3
+from dataclasses import dataclass, field
+
+from .api.endpoint.submissions import SubmissionsApi
+
+EPOCH = "1970-01-01T00:00:00Z"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    course_id TEXT NOT NULL,
+    assignment_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    attempt INTEGER,
+    submitted_at TEXT,
+    graded_at TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (course_id, assignment_id, user_id)
+);
+CREATE TABLE IF NOT EXISTS watermarks (
+    course_id TEXT NOT NULL,
+    assignment_id TEXT NOT NULL,
+    watermark TEXT NOT NULL,
+    PRIMARY KEY (course_id, assignment_id)
+);
+"""
+
+
+@dataclass
+class SyncResult:
+    new: list = field(default_factory=list)
+    resubmitted: list = field(default_factory=list)
+    regraded: list = field(default_factory=list)
+
+    def __bool__(self):
+        return bool(self.new or self.resubmitted or self.regraded)
+
+
+class SubmissionStore:
+    """
+    Local copy of assignment submissions, kept up to date incrementally.
+
+    The first sync of an assignment lists every submission. Later syncs only
+    ask Canvas for submissions submitted or graded since the latest timestamp
+    seen so far, so their cost follows the number of changes rather than the
+    size of the class.
+    """
+
+    def __init__(self, path):
+        self._db = sqlite3.connect(path)
+        self._db.executescript(SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def watermark(self, course_id, assignment_id):
+        row = self._db.execute(
+            "SELECT watermark FROM watermarks WHERE course_id = ? AND assignment_id = ?",
+            (str(course_id), str(assignment_id)),
+        ).fetchone()
+        return row[0] if row else None
+
+    def get(self, course_id, assignment_id, user_id):
+        row = self._db.execute(
+            "SELECT data FROM submissions"
+            " WHERE course_id = ? AND assignment_id = ? AND user_id = ?",
+            (str(course_id), str(assignment_id), str(user_id)),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def submissions(self, course_id, assignment_id):
+        rows = self._db.execute(
+            "SELECT data FROM submissions WHERE course_id = ? AND assignment_id = ?",
+            (str(course_id), str(assignment_id)),
+        )
+        for (data,) in rows:
+            yield json.loads(data)
+
+    def sync(self, api: SubmissionsApi, *, workers=0) -> SyncResult:
+        """
+        Fetch what changed on Canvas since the last sync and merge it in.
+        """
+        course_id, assignment_id = str(api.course_id), str(api.assignment_id)
+        watermark = self.watermark(course_id, assignment_id)
+
+        if watermark is None:
+            changed = api.index(workers=workers)
+        else:
+            changed = {
+                s["user_id"]: s
+                for since in (
+                    {"submitted_since": watermark},
+                    {"graded_since": watermark},
+                )
+                for s in api.list_for_students(workers=workers, **since)
+            }.values()
+
+        result = SyncResult()
+
+        with self._db:
+            for submission in changed:
+                previous = self.get(course_id, assignment_id, submission["user_id"])
+                self._classify(result, previous, submission)
+
+                self._db.execute(
+                    "INSERT OR REPLACE INTO submissions VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        course_id,
+                        assignment_id,
+                        str(submission["user_id"]),
+                        submission.get("attempt"),
+                        submission.get("submitted_at"),
+                        submission.get("graded_at"),
+                        json.dumps(submission),
+                    ),
+                )
+
+                stamps = [submission.get("submitted_at"), submission.get("graded_at")]
+                watermark = max(filter(None, [watermark, *stamps]), default=None)
+
+            # Nothing submitted or graded yet; later syncs can still be incremental.
+            watermark = watermark or EPOCH
+            self._db.execute(
+                "INSERT OR REPLACE INTO watermarks VALUES (?, ?, ?)",
+                (course_id, assignment_id, watermark),
+            )
+
+        return result
+
+    @staticmethod
+    def _classify(result: SyncResult, previous, submission):
+        if submission.get("submitted_at") and not (
+            previous and previous.get("submitted_at")
+        ):
+            result.new.append(submission)
+        elif previous and (
+            submission.get("submitted_at") != previous.get("submitted_at")
+            or submission.get("attempt") != previous.get("attempt")
+        ):
+            result.resubmitted.append(submission)
+        elif previous is None or (
+            submission.get("graded_at") != previous.get("graded_at")
+            or submission.get("score") != previous.get("score")
+        ):
+            if submission.get("graded_at"):
+                result.regraded.append(submission)
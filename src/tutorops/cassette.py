@@ -0,0 +1,339 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+from typing import Iterable
+
+import httpx
+
+from .headers import DROPPED_HEADERS
+
+# Index entries: request key digest, sequence number among requests with the
+# same key, and offset and length of the record in the data file. The index
+# starts with the length of the data file it covers.
+ENTRY = struct.Struct(">32sIQI")
+KEY_SIZE = 36
+COVERED = struct.Struct(">Q")
+
+# Records start with their own key, so the index can be rebuilt from them,
+# followed by the lengths of their metadata and content.
+RECORD = struct.Struct(">36sII")
+
+MODES = ("record", "replay", "auto")
+
+
+class CassetteMiss(LookupError):
+    pass
+
+
+def request_key(
+    request: httpx.Request, *, ignore_params: Iterable[str] = (), body=True
+):
+    """
+    Match key of a request: its method, URL with sorted query parameters
+    except `ignore_params`, and, with `body`, its content.
+    """
+    ignore = set(ignore_params)
+    params = tuple(
+        sorted((k, v) for k, v in request.url.params.multi_items() if k not in ignore)
+    )
+    url = request.url.copy_with(query=None).copy_merge_params(params)
+
+    h = hashlib.sha256(f"{request.method} {url}".encode())
+    if body:
+        h.update(b"\n" + request.read())
+    return h.digest()
+
+
+class Cassette:
+    """
+    Recorded responses for replaying HTTP traffic offline.
+
+    Records are appended to the data file at `path` and located through a
+    sorted index of fixed-width entries in `<path>.idx`, which is memory-mapped
+    and binary-searched, so opening a cassette costs nothing regardless of
+    its size. Repeated requests with the same key, e.g. progress polls, are
+    replayed in the order they were recorded, and the last one is repeated
+    once they run out.
+
+    In `record` mode every request goes to the network and is recorded, in
+    `replay` mode a request that was not recorded raises `CassetteMiss`, and
+    in `auto` mode only those are sent and recorded. Requests are matched on
+    method, URL and query parameters except `ignore_params`, and unless
+    `match_body` is false, on content. A different `match` function taking a
+    request and returning bytes can be given instead.
+
+    Pass a cassette as `cassette` to `CanvasClient`, `AsyncCanvasClient` or
+    `GitHub`. New records are merged into the index on `close`. Each record
+    also carries its key, so records the index does not cover yet, e.g.
+    after a run that was never closed, are recovered from the data file when
+    the cassette is opened again.
+    """
+
+    def __init__(
+        self,
+        path,
+        *,
+        mode="auto",
+        ignore_params: Iterable[str] = (),
+        match_body=True,
+        match=None,
+    ):
+        assert mode in MODES
+
+        self.path = path
+        self.mode = mode
+        self.ignore_params = tuple(ignore_params)
+        self.match_body = match_body
+        self.match = match
+
+        self._lock = threading.Lock()
+        self._replayed: dict = {}
+        self._recorded: dict = {}
+        self._index = None
+
+        if mode == "record":
+            open(self.path, "wb").close()
+            if os.path.exists(self._index_path):
+                os.remove(self._index_path)
+
+        self._data = open(self.path, "a+b")
+
+        covered = 0
+        if os.path.exists(self._index_path):
+            with open(self._index_path, "rb") as f:
+                if os.fstat(f.fileno()).st_size > COVERED.size:
+                    self._index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    (covered,) = COVERED.unpack_from(self._index)
+
+        self._recover(covered)
+
+    @property
+    def _index_path(self):
+        return f"{self.path}.idx"
+
+    def _recover(self, offset):
+        """
+        Index the records appended after `offset`, dropping a trailing record
+        that was cut off while being written.
+        """
+        self._data.seek(0, os.SEEK_END)
+        end = self._data.tell()
+
+        while offset + RECORD.size <= end:
+            self._data.seek(offset)
+            full, meta, content = RECORD.unpack(self._data.read(RECORD.size))
+            length = RECORD.size + meta + content
+            if offset + length > end:
+                break
+            self._recorded[full] = (offset, length)
+            offset += length
+
+        if offset < end and self.mode != "replay":
+            self._data.truncate(offset)
+
+    def close(self):
+        with self._lock:
+            if self._recorded:
+                self._write_index()
+            if self._index is not None:
+                self._index.close()
+            self._data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def key(self, request: httpx.Request) -> bytes:
+        if self.match:
+            return hashlib.sha256(self.match(request)).digest()
+        return request_key(
+            request, ignore_params=self.ignore_params, body=self.match_body
+        )
+
+    def transport(self, inner: httpx.BaseTransport | None = None):
+        return CassetteTransport(self, inner=inner)
+
+    def async_transport(self, inner: httpx.AsyncBaseTransport | None = None):
+        return AsyncCassetteTransport(self, inner=inner)
+
+    def lookup(self, request: httpx.Request):
+        """
+        Replay the next recorded response for a request, or return None.
+        """
+        if self.mode == "record":
+            return None
+
+        key = self.key(request)
+        with self._lock:
+            seq = self._replayed.get(key, 0)
+            location = self._find(key, seq)
+            if location:
+                self._replayed[key] = seq + 1
+            elif seq:
+                location = self._find(key, seq - 1)
+
+            if not location:
+                return None
+
+            self._data.seek(location[0])
+            record = self._data.read(location[1])
+
+        _, size, _ = RECORD.unpack_from(record)
+        meta = json.loads(record[RECORD.size : RECORD.size + size])
+        return httpx.Response(
+            meta["status"],
+            headers=meta["headers"],
+            content=record[RECORD.size + size :],
+            request=request,
+        )
+
+    def record(self, request: httpx.Request, response: httpx.Response):
+        key = self.key(request)
+        meta = json.dumps(
+            {
+                "status": response.status_code,
+                "headers": [
+                    (k, v)
+                    for k, v in response.headers.items()
+                    if k.lower() not in DROPPED_HEADERS
+                ],
+            },
+            separators=(",", ":"),
+        ).encode()
+
+        with self._lock:
+            seq = self._replayed.get(key, 0)
+            while self._find(key, seq):
+                seq += 1
+            self._replayed[key] = seq + 1
+
+            full = key + struct.pack(">I", seq)
+            record = (
+                RECORD.pack(full, len(meta), len(response.content))
+                + meta
+                + response.content
+            )
+
+            self._data.seek(0, os.SEEK_END)
+            offset = self._data.tell()
+            self._data.write(record)
+            self._data.flush()
+            self._recorded[full] = (offset, len(record))
+
+    def miss(self, request: httpx.Request):
+        raise CassetteMiss(f"no recorded response for {request.method} {request.url}")
+
+    def _find(self, key, seq):
+        """
+        Offset and length of a record, looked up among records not indexed
+        yet first and then by binary search over the index.
+        """
+        full = key + struct.pack(">I", seq)
+        if full in self._recorded:
+            return self._recorded[full]
+
+        if self._index is None:
+            return None
+
+        lo, hi = 0, (len(self._index) - COVERED.size) // ENTRY.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = COVERED.size + mid * ENTRY.size
+            probe = self._index[start : start + KEY_SIZE]
+            if probe < full:
+                lo = mid + 1
+            elif probe > full:
+                hi = mid
+            else:
+                _, _, offset, length = ENTRY.unpack_from(self._index, start)
+                return offset, length
+        return None
+
+    def _write_index(self):
+        entries = dict(self._recorded)
+        if self._index is not None:
+            for start in range(COVERED.size, len(self._index), ENTRY.size):
+                digest, seq, offset, length = ENTRY.unpack_from(self._index, start)
+                entries.setdefault(digest + struct.pack(">I", seq), (offset, length))
+
+        self._data.seek(0, os.SEEK_END)
+        tmp = f"{self._index_path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(COVERED.pack(self._data.tell()))
+            for full in sorted(entries):
+                offset, length = entries[full]
+                f.write(
+                    ENTRY.pack(
+                        full[:32], *struct.unpack(">I", full[32:]), offset, length
+                    )
+                )
+        os.replace(tmp, self._index_path)
+        self._recorded.clear()
+
+
+def _stored(request: httpx.Request, response: httpx.Response):
+    return httpx.Response(
+        response.status_code,
+        headers=[
+            (k, v)
+            for k, v in response.headers.items()
+            if k.lower() not in DROPPED_HEADERS
+        ],
+        content=response.content,
+        request=request,
+    )
+
+
+class CassetteTransport(httpx.BaseTransport):
+    def __init__(self, cassette: Cassette, *, inner: httpx.BaseTransport | None = None):
+        self.cassette = cassette
+        self.inner = inner or httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.read()
+        response = self.cassette.lookup(request)
+        if response is not None:
+            return response
+
+        if self.cassette.mode == "replay":
+            self.cassette.miss(request)
+
+        response = self.inner.handle_request(request)
+        response.read()
+        response.close()
+        self.cassette.record(request, response)
+        return _stored(request, response)
+
+    def close(self):
+        self.inner.close()
+
+
+class AsyncCassetteTransport(httpx.AsyncBaseTransport):
+    def __init__(
+        self, cassette: Cassette, *, inner: httpx.AsyncBaseTransport | None = None
+    ):
+        self.cassette = cassette
+        self.inner = inner or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        response = self.cassette.lookup(request)
+        if response is not None:
+            return response
+
+        if self.cassette.mode == "replay":
+            self.cassette.miss(request)
+
+        response = await self.inner.handle_async_request(request)
+        await response.aread()
+        await response.aclose()
+        self.cassette.record(request, response)
+        return _stored(request, response)
+
+    async def aclose(self):
+        await self.inner.aclose()
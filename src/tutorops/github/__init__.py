@@ -1,16 +1,76 @@
+import asyncio
+import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import httpx
 
+from .. import load_env
+from ..cache import ResponseCache
+from ..cassette import Cassette
+from ..instrument import Instrumentation
+from .budget import RateBudget
+
+SNAPSHOT = """
+  r{i}: repository(owner: {owner}, name: {name}) {{
+    nameWithOwner
+    defaultBranchRef {{
+      name
+      target {{
+        ... on Commit {{
+          oid
+          committedDate
+          history(first: 1{until}) {{ nodes {{ oid committedDate }} }}
+        }}
+      }}
+    }}
+    latestRelease {{ tagName name createdAt tagCommit {{ oid }} }}
+  }}"""
+
+
+class GraphQLError(Exception):
+    pass
+
+
+def _snapshot(repository):
+    ref = repository["defaultBranchRef"]
+    target = ref and ref["target"]
+    nodes = target["history"]["nodes"] if target else []
+
+    return {
+        "default_branch": ref and ref["name"],
+        "head": target
+        and {"oid": target["oid"], "committedDate": target["committedDate"]},
+        "commit": nodes[0] if nodes else None,
+        "release": repository["latestRelease"],
+    }
+
 
 class GitHub:
-    def __init__(self, token: str = None):
+    def __init__(
+        self,
+        token: str = None,
+        *,
+        cache: ResponseCache | None = None,
+        budget: RateBudget | None = None,
+        graphql_budget: RateBudget | None = None,
+        instrument: Instrumentation | None = None,
+        transport: httpx.BaseTransport | None = None,
+        async_transport: httpx.AsyncBaseTransport | None = None,
+        cassette: Cassette | None = None,
+    ):
         if not token:
+            load_env()
             token = os.getenv("GITHUB_PAT")
 
         if not token:
             raise ValueError("GitHub token is required")
 
+        if cassette:
+            transport = cassette.transport(transport)
+            async_transport = cassette.async_transport(async_transport)
+
         self.http = httpx.Client(
             base_url="https://api.github.com",
             headers={
@@ -20,41 +80,260 @@ class GitHub:
             },
             timeout=300,
             follow_redirects=True,
+            event_hooks=instrument.hooks() if instrument else None,
+            transport=transport,
         )
+        self._async_transport = async_transport
+        self.instrument = instrument
+        self.cache = cache
+        self.budget = budget or RateBudget()
+        self.graphql_budget = graphql_budget or RateBudget(resource="graphql")
 
-    def patch(self, url: str, **kwargs):
-        resp = self.http.patch(url, **kwargs)
+    def _send(self, method, url, *, budget=None, **kwargs) -> httpx.Response:
+        budget = budget or self.budget
+        time.sleep(budget.delay())
+        resp = self.http.request(method, url, **kwargs)
+        budget.update(resp)
+        return resp
+
+    def _request(self, method, url, **kwargs) -> httpx.Response:
+        if self.cache and method != "GET":
+            self.cache.invalidate(httpx.URL(url).path)
+
+        resp = self._send(method, url, **kwargs)
         resp.raise_for_status()
-        return resp.json()
+        return resp
+
+    def _get(self, url, *, params=None) -> httpx.Response:
+        """
+        GET through the cache, if any. Cached responses are always revalidated
+        with their ETag, since GitHub does not charge `304` responses.
+        """
+        if not self.cache:
+            return self._request("GET", url, params=params)
+
+        request = self.http.build_request("GET", url, params=params)
+        cached, fresh = self.cache.lookup(request)
+        if cached and fresh:
+            return cached
+
+        headers = self.cache.validators(cached) if cached else None
+        resp = self._send("GET", url, params=params, headers=headers)
+
+        if cached and resp.status_code == 304:
+            self.cache.refresh(request)
+            return cached
 
-    def get(self, url: str):
-        resp = self.http.get(url)
         resp.raise_for_status()
-        return resp.json()
+        self.cache.store(resp)
+        return resp
 
-    def list_commits(self, full_name: str):
+    def patch(self, url: str, **kwargs):
+        return self._request("PATCH", url, **kwargs).json()
+
+    def get(self, url: str, *, params=None):
+        return self._get(url, params=params).json()
+
+    def paginated(self, url: str, *, params=None):
+        """
+        Iterate over the items of a paginated endpoint, following `Link` headers.
+        https://docs.github.com/en/rest/using-the-rest-api/using-pagination-in-the-rest-api
+        """
+        resp = self._get(url, params=params)
+        yield from resp.json()
+
+        # Link URLs already carry the full query string.
+        while "next" in resp.links:
+            resp = self._get(resp.links["next"]["url"])
+            yield from resp.json()
+
+    def iter_commits(
+        self, full_name: str, *, since=None, until=None, per_page: int = 100
+    ):
         """
         https://docs.github.com/en/rest/commits/commits?apiVersion=2022-11-28#list-commits
         """
-        resp = self.http.get(f"/repos/{full_name}/commits")
-        resp.raise_for_status()
-        return resp.json()
+        params = {"per_page": per_page}
+        if since:
+            params["since"] = since
+        if until:
+            params["until"] = until
 
-    def list_accepted_assignments(self, assignment_id: int, per_page: int = 100):
+        return self.paginated(f"/repos/{full_name}/commits", params=params)
+
+    def list_commits(self, full_name: str, **kwargs):
+        return list(self.iter_commits(full_name, **kwargs))
+
+    def iter_accepted_assignments(self, assignment_id: int, per_page: int = 100):
         """
         https://docs.github.com/en/rest/classroom/classroom?apiVersion=2022-11-28#list-accepted-assignments-for-an-assignment
         """
-        resp = self.http.get(
+        return self.paginated(
             f"/assignments/{assignment_id}/accepted_assignments",
             params={"per_page": per_page},
         )
+
+    def list_accepted_assignments(self, assignment_id: int, per_page: int = 100):
+        return list(self.iter_accepted_assignments(assignment_id, per_page))
+
+    def _async_client(self):
+        return httpx.AsyncClient(
+            base_url=self.http.base_url,
+            headers=self.http.headers,
+            timeout=self.http.timeout,
+            follow_redirects=True,
+            event_hooks=self.instrument and self.instrument.async_hooks(),
+            transport=self._async_transport,
+        )
+
+    async def _aget(self, http: httpx.AsyncClient, url, *, params=None):
+        await asyncio.sleep(self.budget.delay())
+        resp = await http.get(url, params=params)
+        self.budget.update(resp)
         resp.raise_for_status()
-        return resp.json()
+        return resp
+
+    async def _acommits(self, http: httpx.AsyncClient, full_name, params):
+        commits = []
+        resp = await self._aget(http, f"/repos/{full_name}/commits", params=params)
+        commits.extend(resp.json())
+
+        while "next" in resp.links:
+            resp = await self._aget(http, resp.links["next"]["url"])
+            commits.extend(resp.json())
+
+        return commits
+
+    async def aharvest_commits(
+        self, assignment_id: int, *, since=None, until=None, concurrency=16
+    ):
+        """
+        Fetch the commits of every accepted assignment repository, with at most
+        `concurrency` requests in flight. Returns a map of repository full name
+        to its commits, or the exception raised while listing them.
+        """
+        params = {"per_page": 100}
+        if since:
+            params["since"] = since
+        if until:
+            params["until"] = until
+
+        repos = [
+            accepted["repository"]["full_name"]
+            for accepted in self.iter_accepted_assignments(assignment_id)
+        ]
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async with self._async_client() as http:
+
+            async def harvest(full_name):
+                async with semaphore:
+                    return await self._acommits(http, full_name, params)
+
+            results = await asyncio.gather(
+                *(harvest(full_name) for full_name in repos), return_exceptions=True
+            )
+
+        return dict(zip(repos, results))
+
+    def harvest_commits(self, assignment_id: int, **kwargs):
+        return asyncio.run(self.aharvest_commits(assignment_id, **kwargs))
+
+    def graphql(self, query: str, variables=None):
+        """
+        https://docs.github.com/en/graphql/guides/forming-calls-with-graphql
+        """
+        payload = {"query": query}
+        if variables:
+            payload["variables"] = variables
+        return self._request(
+            "POST", "/graphql", json=payload, budget=self.graphql_budget
+        ).json()
+
+    def snapshot_repositories(self, full_names, *, deadline=None, chunk_size=50):
+        """
+        Fetch, for each repository, its default branch and head commit, the
+        latest commit on the default branch up to `deadline` (ISO 8601), and
+        its latest release. Repositories are looked up `chunk_size` at a time
+        in one aliased GraphQL query.
+
+        Returns a map of full name to a dict with `default_branch`, `head`,
+        `commit` and `release`, or the `GraphQLError` for that repository. If
+        a chunk fails as a whole, its repositories map to that exception and
+        the other chunks are still fetched.
+        """
+        full_names = list(full_names)
+        until = f", until: {json.dumps(deadline)}" if deadline else ""
+        snapshots = {}
+
+        for start in range(0, len(full_names), chunk_size):
+            chunk = full_names[start : start + chunk_size]
+            fields = []
+            for i, full_name in enumerate(chunk):
+                owner, name = full_name.split("/", 1)
+                fields.append(
+                    SNAPSHOT.format(
+                        i=i, owner=json.dumps(owner), name=json.dumps(name), until=until
+                    )
+                )
+
+            try:
+                resp = self.graphql("query {%s\n}" % "".join(fields))
+            except (httpx.HTTPError, ValueError) as e:
+                snapshots.update((full_name, e) for full_name in chunk)
+                continue
+
+            data = resp.get("data") or {}
+            errors = {}
+            for error in resp.get("errors") or []:
+                path = error.get("path") or [None]
+                errors.setdefault(path[0], error.get("message"))
+
+            for i, full_name in enumerate(chunk):
+                repository = data.get(f"r{i}")
+                if repository:
+                    snapshots[full_name] = _snapshot(repository)
+                else:
+                    message = errors.get(f"r{i}") or next(
+                        iter(errors.values()), "repository not found"
+                    )
+                    snapshots[full_name] = GraphQLError(message)
+
+        return snapshots
+
+    def tag_snapshots(self, snapshots, tag_name: str, name: str, *, concurrency=8):
+        """
+        Create a release of the snapshotted commit of each repository, with at
+        most `concurrency` requests in flight. Returns a map of full name to
+        the release, or the exception raised for it. Repositories without a
+        snapshotted commit are reported with a `ValueError`.
+        """
+
+        def tag(full_name, snapshot):
+            if isinstance(snapshot, Exception):
+                return snapshot
+            if not snapshot["commit"]:
+                return ValueError(f"{full_name} has no commit to tag")
+            return self.create_release(
+                full_name,
+                tag_name,
+                name,
+                target_commitish=snapshot["commit"]["oid"],
+            )
+
+        with ThreadPoolExecutor(concurrency) as pool:
+            futures = {
+                full_name: pool.submit(tag, full_name, snapshot)
+                for full_name, snapshot in snapshots.items()
+            }
+
+        return {
+            full_name: future.exception() or future.result()
+            for full_name, future in futures.items()
+        }
 
     def get_latest_release(self, full_name: str):
-        resp = self.http.get(f"/repos/{full_name}/releases/latest")
-        resp.raise_for_status()
-        return resp.json()
+        return self.get(f"/repos/{full_name}/releases/latest")
 
     def create_release(
         self, full_name: str, tag_name: str, name: str, *, target_commitish=None
@@ -63,6 +342,6 @@ class GitHub:
         if target_commitish:
             payload["target_commitish"] = target_commitish
 
-        resp = self.http.post(f"/repos/{full_name}/releases", json=payload)
-        resp.raise_for_status()
-        return resp.json()
+        return self._request(
+            "POST", f"/repos/{full_name}/releases", json=payload
+        ).json()
@@ -0,0 +1,93 @@
+import threading
+import time
+
+import httpx
+
+
+class RateBudget:
+    """
+    Track the GitHub primary rate limit from response headers.
+    https://docs.github.com/en/rest/using-the-rest-api/rate-limits-for-the-rest-api
+
+    The budget is read from `X-RateLimit-Remaining` and `X-RateLimit-Reset`.
+    Once no more than `reserve` requests are left, requests wait for the
+    window to reset. With `spread`, requests are also paced evenly over what
+    is left of the window, so that polling never runs the budget dry early.
+    Conditional requests answered with `304` are not charged by GitHub.
+
+    GitHub keeps a separate budget per `X-RateLimit-Resource`, e.g. `core`
+    for REST and `graphql`, so a budget only follows the responses of its
+    `resource`.
+    """
+
+    def __init__(self, *, reserve=50, spread=False, resource="core"):
+        self.reserve = reserve
+        self.spread = spread
+        self.resource = resource
+
+        self.limit: int | None = None
+        self.remaining: int | None = None
+        self.used: int | None = None
+        self.reset: float | None = None
+
+        self.requests = 0
+        self.not_modified = 0
+        self.waited = 0.0
+
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+
+    def update(self, resp: httpx.Response):
+        headers = resp.headers
+
+        with self._lock:
+            self.requests += 1
+            if resp.status_code == 304:
+                self.not_modified += 1
+
+            if "X-RateLimit-Remaining" not in headers:
+                return
+            if headers.get("X-RateLimit-Resource", self.resource) != self.resource:
+                return
+
+            self.limit = int(headers.get("X-RateLimit-Limit", 0)) or self.limit
+            self.used = int(headers.get("X-RateLimit-Used", 0))
+            self.reset = float(headers.get("X-RateLimit-Reset", 0))
+            self.remaining = int(headers["X-RateLimit-Remaining"])
+
+    def delay(self):
+        """
+        Seconds to wait before sending the next request, reserving its slot.
+        """
+        with self._lock:
+            now = time.time()
+            at = max(now, self._next_at)
+
+            if self.remaining is not None and self.reset and at < self.reset:
+                if self.remaining <= self.reserve:
+                    at = self._next_at = self.reset
+                elif self.spread:
+                    left = self.reset - at
+                    self._next_at = at + left / (self.remaining - self.reserve)
+                # Count the request until its response reports the real figure.
+                self.remaining -= 1
+
+            self.waited += at - now
+            return at - now
+
+    def metrics(self):
+        """
+        Snapshot of the budget, e.g. for logging or a metrics exporter.
+        """
+        with self._lock:
+            return {
+                "resource": self.resource,
+                "limit": self.limit,
+                "remaining": self.remaining,
+                "used": self.used,
+                "reset": self.reset,
+                "resets_in": max(0.0, self.reset - time.time()) if self.reset else None,
+                "requests": self.requests,
+                "not_modified": self.not_modified,
+                "waited": self.waited,
+            }
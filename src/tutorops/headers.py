@@ -0,0 +1,3 @@
+# Headers describing the wire encoding, which no longer applies to the decoded
+# content that is stored for a response.
+DROPPED_HEADERS = frozenset({"content-encoding", "content-length", "transfer-encoding"})
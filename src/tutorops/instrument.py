@@ -0,0 +1,264 @@
+import bisect
+import json
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+
+import httpx
+
+# Upper bounds of the latency buckets, in seconds.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Path segments that vary between requests to the same endpoint, replaced in
+# order. GitHub repository paths are handled first, since owner and name are
+# arbitrary strings.
+TEMPLATES = [
+    (re.compile(r"^/repos/[^/]+/[^/]+"), "/repos/{owner}/{repo}"),
+    (re.compile(r"/(?:sis_\w+:)?[0-9]+(?=/|$)"), "/{id}"),
+    (re.compile(r"/[0-9a-f]{40}(?=/|$)"), "/{sha}"),
+]
+
+# Remaining rate limit headers of Canvas and GitHub.
+HEADROOM = ("X-Rate-Limit-Remaining", "X-RateLimit-Remaining")
+
+START = "tutorops.start"
+
+
+def endpoint(path):
+    """
+    Template of a URL path, e.g. `/api/v1/courses/{id}/assignments/{id}`.
+    """
+    for pattern, replacement in TEMPLATES:
+        path = pattern.sub(replacement, path)
+    return path
+
+
+class _Counted(httpx.SyncByteStream, httpx.AsyncByteStream):
+    """
+    Response body stream that reports the size of each raw chunk as it is read.
+    """
+
+    def __init__(self, stream, count):
+        self.stream = stream
+        self.count = count
+
+    def __iter__(self):
+        for chunk in self.stream:
+            self.count(len(chunk))
+            yield chunk
+
+    async def __aiter__(self):
+        async for chunk in self.stream:
+            self.count(len(chunk))
+            yield chunk
+
+    def close(self):
+        self.stream.close()
+
+    async def aclose(self):
+        await self.stream.aclose()
+
+
+@dataclass
+class EndpointStats:
+    count: int = 0
+    errors: int = 0
+    retries: int = 0
+    bytes_out: int = 0
+    bytes_in: int = 0
+    seconds: float = 0.0
+    buckets: list = field(default_factory=lambda: [0] * (len(BUCKETS) + 1))
+
+    def quantile(self, q):
+        """
+        Estimate a latency quantile by interpolating within its bucket.
+        """
+        if not self.count:
+            return None
+
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            if seen + n >= rank and n:
+                lower = BUCKETS[i - 1] if i else 0.0
+                upper = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return BUCKETS[-1]
+
+
+class Instrumentation:
+    """
+    Request metrics collected through httpx event hooks.
+
+    Requests are grouped by method and endpoint template, and each group
+    counts requests, errors (status 400 and up), retries, bytes sent and
+    received, and a latency histogram. Received bytes are counted off the
+    response body as it is read from the network, before decompression, so
+    bodies that are never read count nothing; sent bytes are taken from
+    `Content-Length` and miss request bodies streamed without one. Latency is
+    measured up to the response headers, which is when httpx calls response
+    hooks. The lowest remaining rate limit seen per host is kept as headroom.
+
+    Pass an instance as `instrument` to `CanvasClient`, `AsyncCanvasClient` or
+    `GitHub`; clients without one install no hooks at all. With `on_span`,
+    every request is also reported as a dict shaped like an OpenTelemetry span,
+    using the HTTP semantic conventions for its attributes.
+    """
+
+    def __init__(self, *, on_span=None):
+        self.on_span = on_span
+
+        self.endpoints: dict[tuple[str, str], EndpointStats] = {}
+        self.headroom: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def hooks(self):
+        return {"request": [self._on_request], "response": [self._on_response]}
+
+    def async_hooks(self):
+        async def on_request(request):
+            self._on_request(request)
+
+        async def on_response(response):
+            self._on_response(response)
+
+        return {"request": [on_request], "response": [on_response]}
+
+    def _on_request(self, request: httpx.Request):
+        request.extensions[START] = (time.time_ns(), time.perf_counter())
+
+    def _on_response(self, response: httpx.Response):
+        request = response.request
+        start_ns, start = request.extensions.get(START, (None, None))
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+
+        key = (request.method, endpoint(request.url.path))
+        status = response.status_code
+        retry = request.extensions.get("attempt", 0) > 0
+
+        with self._lock:
+            stats = self.endpoints.get(key)
+            if stats is None:
+                stats = self.endpoints[key] = EndpointStats()
+
+            stats.count += 1
+            stats.errors += status >= 400
+            stats.retries += retry
+            stats.bytes_out += int(request.headers.get("Content-Length", 0))
+            stats.seconds += elapsed
+            stats.buckets[bisect.bisect_left(BUCKETS, elapsed)] += 1
+
+            for header in HEADROOM:
+                if header in response.headers:
+                    remaining = float(response.headers[header])
+                    host = request.url.host
+                    self.headroom[host] = min(
+                        self.headroom.get(host, remaining), remaining
+                    )
+
+        def received(n):
+            with self._lock:
+                stats.bytes_in += n
+
+        # Bodies held in memory, e.g. replayed ones, have been read already.
+        if response.is_stream_consumed:
+            received(len(response.content))
+        else:
+            response.stream = _Counted(response.stream, received)
+
+        if self.on_span:
+            self.on_span(
+                {
+                    "name": "{} {}".format(*key),
+                    "start_time_unix_nano": start_ns,
+                    "end_time_unix_nano": start_ns + int(elapsed * 1e9),
+                    "attributes": {
+                        "http.request.method": request.method,
+                        "http.response.status_code": status,
+                        "http.request.resend_count": request.extensions.get(
+                            "attempt", 0
+                        ),
+                        "server.address": request.url.host,
+                        "url.template": key[1],
+                    },
+                }
+            )
+
+    def reset(self):
+        with self._lock:
+            self.endpoints.clear()
+            self.headroom.clear()
+
+    def summary(self):
+        with self._lock:
+            endpoints = [
+                {
+                    "method": method,
+                    "endpoint": path,
+                    "count": stats.count,
+                    "errors": stats.errors,
+                    "retries": stats.retries,
+                    "bytes_out": stats.bytes_out,
+                    "bytes_in": stats.bytes_in,
+                    "seconds": stats.seconds,
+                    "p50": stats.quantile(0.5),
+                    "p95": stats.quantile(0.95),
+                    "p99": stats.quantile(0.99),
+                }
+                for (method, path), stats in sorted(self.endpoints.items())
+            ]
+            return {"endpoints": endpoints, "headroom": dict(self.headroom)}
+
+    def to_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def to_prometheus(self, path):
+        """
+        Write the metrics in the Prometheus text exposition format, e.g. for
+        the node exporter's textfile collector.
+        """
+        counters = {
+            "tutorops_http_requests_total": "count",
+            "tutorops_http_errors_total": "errors",
+            "tutorops_http_retries_total": "retries",
+            "tutorops_http_sent_bytes_total": "bytes_out",
+            "tutorops_http_received_bytes_total": "bytes_in",
+        }
+        histogram = "tutorops_http_request_duration_seconds"
+        lines = []
+
+        with self._lock:
+            endpoints = sorted(self.endpoints.items())
+            labels = {
+                key: 'method="{}",endpoint="{}"'.format(*key) for key, _ in endpoints
+            }
+
+            for name, attr in counters.items():
+                lines.append(f"# TYPE {name} counter")
+                for key, stats in endpoints:
+                    lines.append(f"{name}{{{labels[key]}}} {getattr(stats, attr)}")
+
+            lines.append(f"# TYPE {histogram} histogram")
+            for key, stats in endpoints:
+                cumulative = 0
+                for bound, n in zip((*BUCKETS, "+Inf"), stats.buckets):
+                    cumulative += n
+                    lines.append(
+                        f'{histogram}_bucket{{{labels[key]},le="{bound}"}} {cumulative}'
+                    )
+                lines.append(f"{histogram}_sum{{{labels[key]}}} {stats.seconds}")
+                lines.append(f"{histogram}_count{{{labels[key]}}} {stats.count}")
+
+            lines.append("# TYPE tutorops_rate_limit_remaining gauge")
+            for host, remaining in sorted(self.headroom.items()):
+                lines.append(
+                    f'tutorops_rate_limit_remaining{{host="{host}"}} {remaining}'
+                )
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")